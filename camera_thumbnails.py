@@ -1,13 +1,50 @@
+import math
 import time
+from collections import OrderedDict
 from contextlib import contextmanager
 
 import bpy
 import gpu
-from mathutils import Vector
+from gpu_extras.presets import draw_texture_2d
+from mathutils import Matrix, Vector
 
 from .debug import DEBUG_PREVIEW_CAMERA
 from .utils import get_camera
 from .utils.area import get_area_max_parent
+from .utils.depsgraph import get_depsgraph
+
+C_OFFSCREEN_POOL_SIZE = 8  # 离屏缓冲数量下限, 预览相机较多时按每个相机两个(完整/渐进分辨率)扩大
+C_IDLE_DELAY = 0.3  # 停止请求多久后视为交互结束(秒)
+C_PROGRESSIVE_SCALE = 0.25  # 交互中预览的分辨率比例, 像素数为1/16
+
+
+def get_preview_render_size(context, scale: float = 1.0) -> tuple[int, int]:
+    """按比例缩放的预览渲染尺寸"""
+    from .utils import get_camera_preview_size
+    w, h = get_camera_preview_size(context)
+    return max(int(w * scale), 1), max(int(h * scale), 1)
+
+
+def get_refresh_interval() -> float:
+    from .utils import get_pref
+    return 1 / get_pref().camera_thumb.refresh_rate
+
+
+def thumbnail_timer():
+    return CameraThumbnails.on_timer()
+
+
+def contact_sheet_timer():
+    return CameraThumbnails.on_contact_sheet_timer()
+
+
+def get_timer_window() -> "bpy.types.Window | None":
+    """计时器中context.window可能为空, 使用第一个窗口"""
+    window = bpy.context.window
+    if window is None:
+        windows = bpy.context.window_manager.windows
+        window = windows[0] if len(windows) else None
+    return window
 
 
 @contextmanager
@@ -36,8 +73,191 @@ def camera_context(context):
     yield False
 
 
+class OffScreenPool:
+    """GPUOffScreen池, 按 (camera_name, width, height) 复用
+    超出容量时释放(free)最久未使用的离屏缓冲
+    """
+
+    def __init__(self, max_size: int = 8, on_free=None):
+        self.max_size = max_size
+        self.on_free = on_free  # on_free(key, offscreen), 在free之前调用
+        self.items = OrderedDict()
+        self.stats = {"created": 0, "reused": 0, "freed": 0}
+
+    def __len__(self):
+        return len(self.items)
+
+    def get(self, camera_name: str, width: int, height: int) -> gpu.types.GPUOffScreen:
+        key = (camera_name, width, height)
+        offscreen = self.items.get(key)
+        if offscreen is not None:
+            self.items.move_to_end(key)
+            self.stats["reused"] += 1
+            return offscreen
+
+        offscreen = self.items[key] = gpu.types.GPUOffScreen(width, height)
+        self.stats["created"] += 1
+        while len(self.items) > self.max_size:
+            self._free(*self.items.popitem(last=False))
+        return offscreen
+
+    def _free(self, key, offscreen):
+        if self.on_free:
+            self.on_free(key, offscreen)
+        offscreen.free()
+        self.stats["freed"] += 1
+
+    def free(self, camera_name: "str | None" = None):
+        """释放指定相机的全部缓冲, camera_name为None时全部释放"""
+        for key in [k for k in self.items if camera_name is None or k[0] == camera_name]:
+            self._free(key, self.items.pop(key))
+
+    def free_other_sizes(self, sizes):
+        """释放尺寸不在sizes中的缓冲, 预览尺寸变化后旧尺寸的缓冲不会再被使用
+
+        :param sizes: {(width, height)}
+        """
+        for key in [k for k in self.items if k[1:] not in sizes]:
+            self._free(key, self.items.pop(key))
+
+
+class ContactSheet:
+    """多相机拼图
+    所有相机按网格渲染到同一个GPUOffScreen中, 绘制时只有一张纹理和一次绘制
+    每个相机先渲染到单格大小的缓冲, 再贴到拼图中对应的格子
+    """
+
+    def __init__(self):
+        self.atlas = None  # gpu.types.GPUOffScreen
+        self.tile = None  # 单格渲染缓冲
+        self.camera_names = []
+        self.columns = 1
+        self.rows = 1
+        self.tile_size = (1, 1)
+        self.dirty = set()  # 待渲染的相机名称
+        self.cursor = 0  # 轮询位置
+        self.stats = {"tiles": 0, "ticks": 0, "last_cost": 0.0}
+
+    @property
+    def size(self) -> tuple[int, int]:
+        return self.columns * self.tile_size[0], self.rows * self.tile_size[1]
+
+    def layout(self, camera_names: list[str], tile_size: tuple[int, int], columns: int = 0):
+        """设置拼图中的相机与格子尺寸, 布局变化时重新分配缓冲并全部重绘
+
+        :param columns: 列数, 0为自动(接近正方形)
+        """
+        count = max(len(camera_names), 1)
+        if columns <= 0:
+            columns = math.ceil(math.sqrt(count))
+        columns = min(columns, count)
+        rows = math.ceil(count / columns)
+
+        if (camera_names == self.camera_names and tile_size == self.tile_size and
+                columns == self.columns and rows == self.rows and self.atlas is not None):
+            return
+
+        self.free()
+        self.camera_names = list(camera_names)
+        self.tile_size = tile_size
+        self.columns = columns
+        self.rows = rows
+        self.cursor = 0
+        self.dirty = set(camera_names)
+
+        self.atlas = gpu.types.GPUOffScreen(*self.size)
+        self.tile = gpu.types.GPUOffScreen(*tile_size)
+        with self.atlas.bind():
+            gpu.state.active_framebuffer_get().clear(color=(0.0, 0.0, 0.0, 1.0))
+
+    def free(self):
+        for offscreen in (self.atlas, self.tile):
+            if offscreen is not None:
+                offscreen.free()
+        self.atlas = self.tile = None
+        self.camera_names = []
+
+    def mark_dirty(self, names=None):
+        """标记需要重绘的相机, names为None时全部重绘"""
+        if names is None:
+            self.dirty = set(self.camera_names)
+        else:
+            self.dirty |= set(names) & set(self.camera_names)
+
+    def tile_rect(self, index: int) -> tuple[int, int, int, int]:
+        """格子的像素区域(x, y, w, h), 从左上角开始排列"""
+        w, h = self.tile_size
+        column = index % self.columns
+        row = self.rows - 1 - index // self.columns
+        return column * w, row * h, w, h
+
+    def render(self, context, budget: float) -> list[str]:
+        """从轮询位置开始渲染待重绘的相机, 超出时间预算后停止
+
+        :param budget: 秒, 至少渲染一个格子
+        :return: 渲染了的相机名称
+        """
+        start_time = time.perf_counter()
+        rendered = []
+        count = len(self.camera_names)
+        do_color_management = (bpy.app.version >= (5, 0, 0))
+        w, h = self.tile_size
+
+        for step in range(count):
+            if not self.dirty:
+                break
+            if rendered and time.perf_counter() - start_time > budget:
+                break
+
+            index = (self.cursor + step) % count
+            name = self.camera_names[index]
+            if name not in self.dirty:
+                continue
+            self.dirty.discard(name)
+            camera = context.scene.objects.get(name, None)
+            if camera is None:
+                continue
+
+            self.tile.draw_view3d(
+                context.scene,
+                context.view_layer,
+                context.space_data,
+                context.region,
+                camera.matrix_world.inverted(),
+                camera.calc_matrix_camera(get_depsgraph(context), x=w, y=h),
+                do_color_management=do_color_management,
+                draw_background=True,
+            )
+            self.blit(index)
+            rendered.append(name)
+            self.cursor = (index + 1) % count
+
+        cost = time.perf_counter() - start_time
+        self.stats["tiles"] += len(rendered)
+        self.stats["ticks"] += 1
+        self.stats["last_cost"] = cost
+        return rendered
+
+    def blit(self, index: int):
+        """将单格缓冲贴到拼图中"""
+        x, y, w, h = self.tile_rect(index)
+        atlas_w, atlas_h = self.size
+        with self.atlas.bind():
+            gpu.state.viewport_set(x, y, w, h)
+            with gpu.matrix.push_pop(), gpu.matrix.push_pop_projection():
+                gpu.matrix.load_matrix(Matrix.Identity(4))
+                gpu.matrix.load_projection_matrix(Matrix.Identity(4))
+                draw_texture_2d(self.tile.texture_color, (-1, -1), 2, 2)
+            gpu.state.viewport_set(0, 0, atlas_w, atlas_h)
+
+    def draw(self, x: float = 0, y: float = 0):
+        """以原始尺寸绘制整张拼图"""
+        if self.atlas is not None:
+            draw_texture_2d(self.atlas.texture_color, (x, y), *self.size)
+
+
 class CameraThumbnails:
-    """Camera Thumbnails\nLeft Click: Enable\nCtrl: Pin Selected Camera\nCtrl Shift Click: Send to Viewer"""
+    """Camera Thumbnails\nLeft Click: Enable\nCtrl: Pin Selected Camera\nAlt: Contact Sheet\nCtrl Shift Click: Send to Viewer"""
 
     camera_data = {
         # area:{
@@ -45,12 +265,30 @@ class CameraThumbnails:
         # offset:Vector
         # pin:bool,
         # enabled:bool,
+        # grid:bool, 拼图模式
         # }
     }
 
     texture_data = {
         # camera_name:gpu.types.GPUTexture
     }
+    texture_owner = {
+        # camera_name:(camera_name, width, height) 纹理所属的离屏缓冲
+    }
+    offscreen_pool = None  # OffScreenPool, 首次渲染时创建
+    render_stats = {"performed": 0, "skipped": 0}
+    # 刷新调度状态
+    scheduler = {
+        "dirty": set(),  # 待渲染的相机名称
+        "dirty_all": False,
+        "pending": False,  # 有未处理的请求
+        "last_request": 0.0,
+        "last_refresh": 0.0,
+        "interactive": 0,  # 本次交互中的刷新次数
+        "final": set(),  # 交互结束后需要最终渲染的相机
+    }
+    refresh_stats = {"count": 0, "last_cost": 0.0, "max_cost": 0.0, "total_cost": 0.0}
+    contact_sheet = ContactSheet()
 
     @classmethod
     def pin_selected_camera(cls, context, camera: bpy.types.Camera):
@@ -71,21 +309,164 @@ class CameraThumbnails:
         camera_name = "camera_name" if camera is None else camera.name
 
         if area_hash in data:
-            data[area_hash]["enabled"] = data[area_hash]["enabled"] ^ True
+            value = data[area_hash]
+            value["enabled"] = value["enabled"] ^ True
+            if value["enabled"] and value.get("grid", False):  # 关闭期间不处理更新请求, 拼图全部重绘
+                cls.contact_sheet.mark_dirty()
+                cls.request_contact_sheet(context)
         else:
             data[area_hash] = {
                 "camera_name": camera_name,
                 "offset": Vector((0, 0)),
                 "pin": False,
                 "enabled": True,
+                "grid": False,
             }
         cls.update()
 
     @classmethod
-    def update(cls):
-        from .debug import DEBUG_PREVIEW_CAMERA
-        start_time = time.time()
-        context = bpy.context
+    def switch_contact_sheet(cls, context):
+        """切换当前区域的拼图模式"""
+        data = cls.camera_data
+        area_hash = hash(get_area_max_parent(context.area))
+        if area_hash not in data:
+            cls.switch_preview(context, get_camera(context))
+
+        value = data[area_hash]
+        value["grid"] = not value.get("grid", False)
+        value["enabled"] = True
+        if value["grid"]:
+            cls.request_contact_sheet(context)
+        else:
+            if not cls.is_contact_sheet_used():
+                cls.contact_sheet.free()
+            cls.update()
+
+    @classmethod
+    def check_is_grid(cls, context):
+        area_hash = hash(get_area_max_parent(context.area))
+        value = cls.camera_data.get(area_hash)
+        return value is not None and value.get("enabled", False) and value.get("grid", False)
+
+    @classmethod
+    def get_contact_sheet_cameras(cls, context) -> list[str]:
+        """拼图中的相机, 按 camera_thumb.contact_sheet_filter 过滤, 按名称排序"""
+        from fnmatch import fnmatch
+        from .utils import get_pref
+        pref = get_pref().camera_thumb
+        cameras = [obj for obj in context.scene.objects if obj.type == "CAMERA"]
+
+        if pref.contact_sheet_filter == "SELECTED":
+            cameras = [obj for obj in cameras if obj.select_get()]
+        elif pref.contact_sheet_filter == "VISIBLE":
+            cameras = [obj for obj in cameras if obj.visible_get()]
+        elif pref.contact_sheet_filter == "NAME":
+            pattern = pref.contact_sheet_pattern or "*"
+            cameras = [obj for obj in cameras if fnmatch(obj.name, pattern)]
+        return sorted(obj.name for obj in cameras)
+
+    @classmethod
+    def is_contact_sheet_used(cls) -> bool:
+        return any(value.get("enabled", False) and value.get("grid", False) for value in cls.camera_data.values())
+
+    @classmethod
+    def is_preview_used(cls) -> bool:
+        """是否有启用的预览或拼图"""
+        return any(value.get("enabled", False) for value in cls.camera_data.values())
+
+    @classmethod
+    def request_contact_sheet(cls, context, depsgraph=None):
+        """更新拼图布局并标记变化的相机, 由计时器在时间预算内轮询渲染"""
+        from .utils import get_pref
+        if not cls.is_contact_sheet_used():
+            return
+        pref = get_pref().camera_thumb
+        sheet = cls.contact_sheet
+
+        camera_names = cls.get_contact_sheet_cameras(context)
+        if not camera_names:
+            sheet.free()
+            return
+        ratio = context.scene.render.resolution_x / context.scene.render.resolution_y
+        tile_w = pref.contact_sheet_tile_width
+        tile_size = (tile_w, max(int(tile_w / ratio), 1))
+        sheet.layout(camera_names, tile_size, pref.contact_sheet_columns)
+
+        if depsgraph is not None:
+            dirty, dirty_all = cls.get_dirty_cameras(depsgraph, set(camera_names))
+            sheet.mark_dirty(None if dirty_all else dirty)
+
+        if sheet.dirty and not bpy.app.timers.is_registered(contact_sheet_timer):
+            bpy.app.timers.register(contact_sheet_timer, first_interval=0)
+
+    @classmethod
+    def on_contact_sheet_timer(cls) -> "float | None":
+        """每次调用只在 camera_thumb.contact_sheet_budget 毫秒内渲染, 未完成时下一帧继续"""
+        from .utils import get_pref
+        sheet = cls.contact_sheet
+        window = get_timer_window()
+        if not sheet.dirty or sheet.atlas is None or window is None:
+            return None
+
+        rendered = []
+        with bpy.context.temp_override(window=window, screen=window.screen):
+            context = bpy.context
+            with camera_context(context) as is_update:
+                if is_update:
+                    rendered = sheet.render(context, get_pref().camera_thumb.contact_sheet_budget / 1000)
+        if not rendered:
+            return None
+
+        for area in window.screen.areas:
+            if area.type == "VIEW_3D":
+                area.tag_redraw()
+        if DEBUG_PREVIEW_CAMERA:
+            print(f"contact sheet {sheet.stats['last_cost'] * 1000:.2f}ms\t", rendered, len(sheet.dirty))
+        return 1 / 60 if sheet.dirty else None
+
+    @classmethod
+    def get_dirty_cameras(cls, depsgraph, camera_names) -> "tuple[set[str], bool]":
+        """根据depsgraph.updates找出需要重新渲染的预览相机
+
+        :param depsgraph: depsgraph_update_post 传入的depsgraph
+        :param camera_names: 当前预览的相机名称
+        :return: (变化的相机名称, 是否影响全部预览)
+        """
+        dirty = set()
+        camera_data_names = {}
+        for name in camera_names:
+            obj = bpy.data.objects.get(name)
+            if obj is not None and obj.data is not None:
+                camera_data_names.setdefault(obj.data.name, set()).add(name)
+
+        for update in depsgraph.updates:
+            id_data = update.id.original
+            if isinstance(id_data, bpy.types.Scene):  # 选择等场景级标记, 不影响画面
+                continue
+            if isinstance(id_data, bpy.types.Object):
+                if id_data.name in camera_names:
+                    dirty.add(id_data.name)
+                    continue
+                if not (update.is_updated_geometry or update.is_updated_transform or update.is_updated_shading):
+                    continue
+                if id_data.type == "CAMERA":  # 其他相机不会被渲染出来
+                    continue
+                if id_data.visible_get() or update.is_updated_transform:  # 可见几何体, 或可见性变化
+                    return dirty, True
+                continue
+            if isinstance(id_data, bpy.types.Camera):
+                dirty.update(camera_data_names.get(id_data.name, ()))
+                continue
+            # 材质/世界/灯光/集合等, 可能影响所有画面
+            return dirty, True
+        return dirty, False
+
+    @classmethod
+    def update_camera_names(cls, context) -> set[str]:
+        """未固定的预览切换为当前相机
+
+        :return: 启用的预览相机名称
+        """
         camera = get_camera(context)
 
         if camera is not None:
@@ -98,28 +479,183 @@ class CameraThumbnails:
                     value["camera_name"] = camera.name
                     cls.camera_data[key] = value
 
+        return {value["camera_name"] for value in cls.camera_data.values()
+                if value.get("enabled", False) and not value.get("grid", False)}
+
+    @classmethod
+    def update(cls, depsgraph=None):
+        """立即更新预览纹理
+
+        :param depsgraph: 由depsgraph_update_post传入时只渲染受影响的相机, 为None时全部渲染
+        """
+        context = bpy.context
+        camera_names = cls.update_camera_names(context)
+        if depsgraph is None:
+            dirty, dirty_all = set(), True
+        else:
+            dirty, dirty_all = cls.get_dirty_cameras(depsgraph, camera_names)
+        cls.render(context, camera_names, dirty, dirty_all)
+
+    @classmethod
+    def render(cls, context, camera_names, dirty, dirty_all, scale: float = 1.0) -> list[str]:
+        """渲染变化的预览相机
+
+        :param camera_names: 启用的预览相机名称
+        :param dirty: 变化的相机名称
+        :param dirty_all: 是否全部渲染
+        :param scale: 渲染分辨率比例, 交互中使用低分辨率
+        :return: 渲染了的相机名称
+        """
+        start_time = time.time()
+
+        # 每个相机最多使用完整与渐进分辨率两个缓冲; 释放旧尺寸的缓冲后, 对应相机没有纹理会重新渲染
+        pool = cls.get_offscreen_pool()
+        pool.max_size = max(C_OFFSCREEN_POOL_SIZE, len(camera_names) * 2)
+        pool.free_other_sizes({get_preview_render_size(context),
+                               get_preview_render_size(context, C_PROGRESSIVE_SCALE)})
+
+        # 没有纹理的相机(新切换/缓冲被释放)也需要渲染; 未变化的相机沿用已有纹理, 不论其分辨率
+        render_names = {name for name in camera_names if
+                        dirty_all or name in dirty or name not in cls.texture_data}
+        cls.render_stats["skipped"] += len(camera_names) - len(render_names)
+        if not render_names:
+            return []
+
         update_completion_list = []
         with camera_context(context) as is_update:
             if is_update:
                 if DEBUG_PREVIEW_CAMERA:
                     print(is_update, "cls.camera_data")
-                for camera_data in cls.camera_data.values():  # 更新相机纹理
-                    camera_name = camera_data["camera_name"]
+                for camera_name in render_names:  # 更新相机纹理
                     camera = context.scene.objects.get(camera_name, None)
-                    enabled = camera_data.get("enabled", False)
-                    repetition_detection = camera_name not in update_completion_list
-                    if camera and enabled and repetition_detection:
-                        cls.update_camera_texture(context, camera)
+                    if camera:
+                        cls.update_camera_texture(context, camera, scale=scale)
                         update_completion_list.append(camera_name)
+        cls.render_stats["performed"] += len(update_completion_list)
 
         if DEBUG_PREVIEW_CAMERA:
-            print(f"update {time.time() - start_time}s\t", update_completion_list)
+            print(f"update {time.time() - start_time}s\t", update_completion_list, cls.render_stats)
             print("\n")
+        return update_completion_list
+
+    @classmethod
+    def request_update(cls, depsgraph=None):
+        """合并更新请求, 由计时器按 camera_thumb.refresh_rate 限制刷新频率
+
+        depsgraph.updates 只在handler中有效, 变化的相机在请求时收集
+        没有启用的预览与拼图时不做任何处理, 开启预览时会全部重新渲染
+        """
+        if not cls.is_preview_used():
+            return
+        context = bpy.context
+        cls.request_contact_sheet(context, depsgraph)
+        camera_names = cls.update_camera_names(context)
+        data = cls.scheduler
+        if depsgraph is None:
+            data["dirty_all"] = True
+        else:
+            dirty, dirty_all = cls.get_dirty_cameras(depsgraph, camera_names)
+            data["dirty"] |= dirty
+            data["dirty_all"] |= dirty_all
+
+        now = time.perf_counter()
+        data["pending"] = True
+        data["last_request"] = now
+        if not bpy.app.timers.is_registered(thumbnail_timer):
+            wait = get_refresh_interval() - (now - data["last_refresh"])
+            bpy.app.timers.register(thumbnail_timer, first_interval=max(wait, 0))
 
     @classmethod
-    def update_camera_texture(cls, context, camera, use_resolution=False) -> gpu.types.GPUTexture:
-        from .utils import get_camera_preview_size
+    def on_timer(cls) -> "float | None":
+        """计时器回调, 返回下次调用的间隔, None时停止
+
+        有请求时按刷新间隔渲染; 请求停止 C_IDLE_DELAY 后, 若期间刷新了多次则做一次最终渲染
+        渐进模式下交互中第一次刷新为完整分辨率, 之后为 C_PROGRESSIVE_SCALE, 最终渲染恢复完整分辨率
+        """
+        from .utils import get_pref
+        data = cls.scheduler
+        interval = get_refresh_interval()
+        now = time.perf_counter()
+
+        if data["pending"]:
+            wait = interval - (now - data["last_refresh"])
+            if wait > 0:
+                return wait
+
+            dirty, dirty_all = data["dirty"], data["dirty_all"]
+            data["dirty"], data["dirty_all"], data["pending"] = set(), False, False
+            progressive = get_pref().camera_thumb.use_progressive and data["interactive"] > 0
+            rendered = cls.refresh(dirty, dirty_all, scale=C_PROGRESSIVE_SCALE if progressive else 1.0)
+            if rendered:
+                data["interactive"] += 1
+                data["final"].update(rendered)
+            return interval
+
+        idle = now - data["last_request"]
+        if idle < C_IDLE_DELAY:
+            return C_IDLE_DELAY - idle
+
+        # 交互结束, 重新渲染交互期间刷新过的相机
+        if data["interactive"] > 1 and data["final"]:
+            cls.refresh(set(data["final"]), False)
+        data["final"].clear()
+        data["interactive"] = 0
+        return None
+
+    @classmethod
+    def refresh(cls, dirty, dirty_all, scale: float = 1.0) -> list[str]:
+        """计时器中渲染并记录耗时
+
+        :param scale: 渲染分辨率比例
+        """
+        window = get_timer_window()
+        if window is None:
+            return []
 
+        start_time = time.perf_counter()
+        with bpy.context.temp_override(window=window, screen=window.screen):
+            context = bpy.context
+            camera_names = cls.update_camera_names(context)
+            rendered = cls.render(context, camera_names, dirty, dirty_all, scale)
+
+        if rendered:  # 计时器中渲染不会触发重绘
+            for area in window.screen.areas:
+                if area.type == "VIEW_3D":
+                    area.tag_redraw()
+
+        data = cls.scheduler
+        data["last_refresh"] = time.perf_counter()
+        if rendered:
+            cost = data["last_refresh"] - start_time
+            stats = cls.refresh_stats
+            stats["count"] += 1
+            stats["last_cost"] = cost
+            stats["max_cost"] = max(stats["max_cost"], cost)
+            stats["total_cost"] += cost
+            if DEBUG_PREVIEW_CAMERA:
+                print(f"refresh {cost * 1000:.2f}ms\t", rendered, stats)
+        return rendered
+
+    @classmethod
+    def get_refresh_report(cls) -> str:
+        stats = cls.refresh_stats
+        if stats["count"] == 0:
+            return "No refresh yet"
+        average = stats["total_cost"] / stats["count"]
+        return (f"Last {stats['last_cost'] * 1000:.1f}ms  "
+                f"Avg {average * 1000:.1f}ms  "
+                f"Max {stats['max_cost'] * 1000:.1f}ms  "
+                f"Renders {cls.render_stats['performed']}/{cls.render_stats['skipped']} skipped")
+
+    @classmethod
+    def reset_scheduler(cls):
+        for timer in (thumbnail_timer, contact_sheet_timer):
+            if bpy.app.timers.is_registered(timer):
+                bpy.app.timers.unregister(timer)
+        cls.scheduler.update(dirty=set(), dirty_all=False, pending=False, interactive=0, final=set())
+
+    @classmethod
+    def update_camera_texture(cls, context, camera, use_resolution=False, scale: float = 1.0) -> gpu.types.GPUTexture:
         is_update = True
         scene = context.scene
         name = camera.name
@@ -128,18 +664,15 @@ class CameraThumbnails:
             render = context.scene.render
             w, h = render.resolution_x, render.resolution_y
         else:
-            w, h = get_camera_preview_size(context)
+            w, h = get_preview_render_size(context, scale)
 
         texture = None
         do_color_management = (bpy.app.version >= (5, 0, 0))
         if is_update:
-            if name not in cls.camera_data:
-                offscreen = gpu.types.GPUOffScreen(w, h)
-            else:
-                offscreen = cls.camera_data[name]
+            offscreen = cls.get_offscreen_pool().get(name, w, h)
             view_matrix = camera.matrix_world.inverted()
             projection_matrix = camera.calc_matrix_camera(
-                context.evaluated_depsgraph_get(),
+                get_depsgraph(context),
                 x=w,
                 y=h,
             )
@@ -156,8 +689,32 @@ class CameraThumbnails:
             if DEBUG_PREVIEW_CAMERA:
                 print("update_camera_texture", camera.name)
             texture = cls.texture_data[name] = offscreen.texture_color
+            cls.texture_owner[name] = (name, w, h)
         return texture
 
+    @classmethod
+    def get_offscreen_pool(cls) -> OffScreenPool:
+        if cls.offscreen_pool is None:
+            cls.offscreen_pool = OffScreenPool(C_OFFSCREEN_POOL_SIZE, on_free=cls._on_offscreen_free)
+        return cls.offscreen_pool
+
+    @classmethod
+    def _on_offscreen_free(cls, key, offscreen):
+        """缓冲被释放时移除引用它的纹理, 避免绘制已释放的纹理"""
+        name = key[0]
+        if cls.texture_owner.get(name) == key:
+            cls.texture_owner.pop(name)
+            cls.texture_data.pop(name, None)
+
+    @classmethod
+    def free(cls):
+        """释放全部离屏缓冲与纹理"""
+        if cls.offscreen_pool is not None:
+            cls.offscreen_pool.free()
+        cls.contact_sheet.free()
+        cls.texture_data.clear()
+        cls.texture_owner.clear()
+
     @classmethod
     def check_is_draw(cls, context):
         area_hash = hash(get_area_max_parent(context.area))
@@ -1 +1,2 @@
 DEBUG_PREVIEW_CAMERA = False
+DEBUG_DEPSGRAPH = False
@@ -4,6 +4,7 @@ import gpu.matrix
 from mathutils import Vector
 
 from .public_gizmo import PublicGizmo
+from ..utils.depsgraph import get_depsgraph
 
 
 class MotionCameraAdjustGizmo(bpy.types.Gizmo):
@@ -33,7 +34,7 @@ class MotionCameraAdjustGizmo(bpy.types.Gizmo):
         with gpu.matrix.push_pop():
             obj = context.object
 
-            depsgraph = context.evaluated_depsgraph_get()
+            depsgraph = get_depsgraph(context)
             evaluated_obj = context.object.evaluated_get(depsgraph)
 
             gpu.state.depth_mask_set(False)
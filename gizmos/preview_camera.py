@@ -55,10 +55,14 @@ class PreviewCameraAreaGizmo(bpy.types.Gizmo):
         从左上角开始绘制
         """
         from ..utils import get_camera_preview_size
-        w, h = get_camera_preview_size(context)
+        data = CameraThumbnails.get_camera_data(context.area)
+        is_grid = data.get("grid", False)
+        if is_grid:  # 拼图模式以拼图的原始尺寸绘制
+            w, h = CameraThumbnails.contact_sheet.size
+        else:
+            w, h = get_camera_preview_size(context)
         with gpu.matrix.push_pop():
             gpu.state.depth_mask_set(False)
-            data = CameraThumbnails.get_camera_data(context.area)
             offset = data["offset"]
             x, y = area_offset(context) + offset
             y = context.area.height - y
@@ -69,7 +73,11 @@ class PreviewCameraAreaGizmo(bpy.types.Gizmo):
             border = 5
             draw_box(-border, w + border, -border, h + border, color)
 
-            if texture := CameraThumbnails.texture_data.get(data["camera_name"], None):
+            texture = None
+            if is_grid:
+                CameraThumbnails.contact_sheet.draw()
+            elif texture := CameraThumbnails.texture_data.get(data["camera_name"], None):
+                # 交互中的低分辨率纹理按预览尺寸拉伸绘制
                 draw_texture_2d(texture, (0, 0), w, h)
             # DEBUG
             if DEBUG_PREVIEW_CAMERA:
@@ -78,6 +86,7 @@ class PreviewCameraAreaGizmo(bpy.types.Gizmo):
                         f"Preview Camera {self.is_hover}",
                         hash(context.area),
                         texture,
+                        CameraThumbnails.texture_owner.get(data["camera_name"], None),
                         f"{self.draw_points}",
                         str(data)
                 ):
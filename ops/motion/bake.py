@@ -1,12 +1,388 @@
 
+import math
+import os
+
+import bpy
+import numpy as np
+from bpy.props import IntProperty, EnumProperty, BoolProperty, FloatProperty
+from mathutils import Quaternion
+
+from .decimate import decimate_keys
+from .op_motion_cam import snapshot_motion_cam, evaluate_motion_cam_snapshot, evaluate_motion_cam
+
+C_OFFSET_FACTOR_PATH = 'motion_cam.offset_factor'
+
+
+def find_fcurve(obj, data_path: str, index: int = 0) -> "bpy.types.FCurve | None":
+    """查找物体当前动作中的F曲线, 兼容4.4之后的分层动作"""
+    anim_data = obj.animation_data
+    if anim_data is None or anim_data.action is None:
+        return None
+
+    action = anim_data.action
+    if hasattr(anim_data, 'action_slot'):
+        from bpy_extras.anim_utils import action_get_channelbag_for_slot
+        channelbag = action_get_channelbag_for_slot(action, anim_data.action_slot)
+        return channelbag.fcurves.find(data_path, index=index) if channelbag else None
+    return action.fcurves.find(data_path, index=index)
+
+
+def get_bake_frames(frame_start, frame_end, frame_step) -> np.ndarray:
+    """包含结束帧的采样帧, frame_step可以为小数"""
+    frame_step = max(frame_step, 1e-3)
+    count = int(np.floor((frame_end - frame_start) / frame_step + 1e-6)) + 1
+    return frame_start + np.arange(max(count, 1), dtype=np.float64) * frame_step
+
+
+def get_shutter_frames(frames: np.ndarray, shutter: float, position: str = 'CENTER',
+                       samples: int = 1) -> np.ndarray:
+    """在每帧的快门区间内过采样, 用于运动模糊
+
+    :param frames: 整帧或小数帧
+    :param shutter: 快门时长(帧)
+    :param position: 快门位置 'START' / 'CENTER' / 'END'
+    :param samples: 每帧的采样数量, 1为不过采样
+    :return: 递增且不重复的采样帧
+    """
+    if samples <= 1 or shutter <= 0:
+        return frames
+
+    if position == 'START':
+        offset = 0
+    elif position == 'END':
+        offset = -shutter
+    else:
+        offset = -shutter / 2
+
+    sub_frames = offset + np.linspace(0, shutter, samples)
+    return np.unique(np.round((frames[:, None] + sub_frames[None, :]).ravel(), 6))
+
+
+def ensure_fcurve(id_data, data_path: str, index: int = 0, group_name: str = '') -> bpy.types.FCurve:
+    anim_data = id_data.animation_data or id_data.animation_data_create()
+    if anim_data.action is None:
+        anim_data.action = bpy.data.actions.new(id_data.name + 'Action')
+
+    action = anim_data.action
+    if hasattr(action, 'fcurve_ensure_for_datablock'):  # 4.4+
+        return action.fcurve_ensure_for_datablock(id_data, data_path, index=index, group_name=group_name)
+
+    fcurve = action.fcurves.find(data_path, index=index)
+    if fcurve is None:
+        fcurve = action.fcurves.new(data_path, index=index, action_group=group_name)
+    return fcurve
+
+
+def write_fcurve_keys(fcurve, frames: np.ndarray, values: np.ndarray, interpolation: str = 'LINEAR'):
+    """一次性写入所有关键帧, 替代逐帧keyframe_insert
+
+    :param fcurve: bpy.types.FCurve, 已有的关键帧会被替换
+    :param frames: (n,) 帧, 需要递增
+    :param values: (n,)
+    """
+    count = len(frames)
+    points = fcurve.keyframe_points
+    points.clear()
+    if count == 0:
+        return
+    points.add(count)
+
+    co = np.empty(count * 2, dtype=np.float32)
+    co[0::2] = frames
+    co[1::2] = values
+    points.foreach_set('co', co)
+
+    interp = points[0].bl_rna.properties['interpolation'].enum_items[interpolation].value
+    points.foreach_set('interpolation', np.full(count, interp, dtype=np.int32))
+    fcurve.update()
+
+
+def samples_to_euler(samples, rotation_mode: str) -> np.ndarray:
+    """四元数转为连续的欧拉角(避免翻转)"""
+    euler = np.empty((len(samples), 3))
+    euler_prev = None
+    for i, quat in enumerate(samples.quaternion):
+        if euler_prev is None:
+            euler_prev = Quaternion(quat).to_euler(rotation_mode)
+        else:
+            euler_prev = Quaternion(quat).to_euler(rotation_mode, euler_prev)
+        euler[i] = euler_prev
+    return euler
+
+
+def get_bake_flags(affect) -> dict[str, bool]:
+    """在主线程读取motion_cam.affect, 线程中只使用结果"""
+    return {
+        'use_euler': affect.use_euler,
+        'use_lens': affect.use_lens,
+        'use_focus_distance': affect.use_focus_distance,
+        'use_aperture_fstop': affect.use_aperture_fstop,
+    }
+
+
+def get_bake_rotation_mode(rotation_mode: str) -> str:
+    if rotation_mode in {'QUATERNION', 'AXIS_ANGLE'}:
+        return 'XYZ'
+    return rotation_mode
+
+
+def prepare_bake_keys(frames: np.ndarray, samples, flags: dict[str, bool], rotation_mode: str = 'XYZ',
+                      tolerances: "dict[str, float] | None" = None) -> list[tuple]:
+    """计算需要写入的关键帧(欧拉角转换与精简), 只使用数组, 可以在线程中调用
+
+    :param frames: 与samples对应的帧
+    :param samples: MotionCamSamples
+    :param flags: get_bake_flags的结果
+    :param rotation_mode: get_bake_rotation_mode的结果
+    :param tolerances: {'location', 'rotation', 'lens'} 的误差, 为None时不精简
+    :return: [(通道组, 是否为相机数据, data_path, index, 帧, 数值)]
+    """
+    # (通道组, 误差类型, [(是否为相机数据, data_path, index, 数值)])
+    groups = [('Object Transforms', 'location',
+               [(False, 'location', i, samples.location[:, i]) for i in range(3)])]
+
+    if flags['use_euler']:
+        euler = samples_to_euler(samples, rotation_mode)
+        groups.append(('Object Transforms', 'rotation',
+                       [(False, 'rotation_euler', i, euler[:, i]) for i in range(3)]))
+    if flags['use_lens']:
+        groups.append(('', 'lens', [(True, 'lens', 0, samples.lens)]))
+    if flags['use_focus_distance']:
+        groups.append(('', 'location', [(True, 'dof.focus_distance', 0, samples.focal)]))
+    if flags['use_aperture_fstop']:
+        groups.append(('', 'lens', [(True, 'dof.aperture_fstop', 0, samples.fstop)]))
+
+    keys = []
+    for group_name, tolerance_type, channels in groups:
+        if tolerances is None:
+            keep = slice(None)
+        else:
+            values = np.stack([values for *_, values in channels], axis=1)
+            keep = decimate_keys(frames, values, tolerances[tolerance_type])
+
+        for is_data, data_path, index, values in channels:
+            keys.append((group_name, is_data, data_path, index, frames[keep], values[keep]))
+    return keys
+
+
+def write_prepared_keys(ob, keys: list[tuple], rotation_mode: str = 'XYZ') -> int:
+    """在主线程写入prepare_bake_keys的结果
+
+    :return: 写入的关键帧数量
+    """
+    if any(data_path == 'rotation_euler' for _, _, data_path, *_ in keys):
+        ob.rotation_mode = rotation_mode
+
+    count = 0
+    for group_name, is_data, data_path, index, frames, values in keys:
+        fcurve = ensure_fcurve(ob.data if is_data else ob, data_path, index, group_name)
+        write_fcurve_keys(fcurve, frames, values)
+        count += len(frames)
+    return count
+
+
+def write_bake_keys(ob, frames: np.ndarray, samples, affect, rotation_mode: str = 'XYZ',
+                    tolerances: "dict[str, float] | None" = None) -> tuple[int, int]:
+    """将批量求值结果写为烘焙相机的关键帧
+
+    :param ob: 烘焙相机
+    :param frames: 与samples对应的帧
+    :param samples: MotionCamSamples
+    :param affect: motion_cam.affect
+    :param tolerances: {'location', 'rotation', 'lens'} 的误差, 为None时不精简
+    :return: (精简前, 精简后) 的关键帧数量
+    """
+    rotation_mode = get_bake_rotation_mode(rotation_mode)
+    keys = prepare_bake_keys(frames, samples, get_bake_flags(affect), rotation_mode, tolerances)
+    count_decimated = write_prepared_keys(ob, keys, rotation_mode)
+    return len(frames) * len(keys), count_decimated
+
+
+def get_bake_camera(obj) -> "bpy.types.Object | None":
+    """运动相机自身或其子级相机"""
+    affect = obj.motion_cam.affect
+    if obj.type == 'CAMERA':
+        return obj
+    elif affect.use_sub_camera and affect.sub_camera and affect.sub_camera.type == 'CAMERA':
+        return affect.sub_camera
+    return None
+
+
+def new_bake_camera(collection, cam) -> bpy.types.Object:
+    cam_data = bpy.data.cameras.new(name=cam.data.name + '_bake')
+    ob = bpy.data.objects.new(cam.name + '_bake', cam_data)
+    collection.objects.link(ob)
+    return ob
+
+
+def get_bake_samples_input(obj, frame_start: float, frame_end: float, frame_step: float = 1,
+                           shutter_samples: int = 1, scene=None, progress=None):
+    """读取烘焙所需的数据(主线程), 之后的求值只使用数组
+
+    :return: (烘焙的相机, 采样帧, offset_factor, MotionCamSnapshot)
+    """
+    cam = get_bake_camera(obj)
+    if cam is None:
+        raise ValueError(f'{obj.name}: no camera to bake')
+
+    fcurve = find_fcurve(obj, C_OFFSET_FACTOR_PATH)
+    if fcurve is None:
+        raise ValueError(f'{obj.name}: offset factor is not animated')
+
+    snapshot = snapshot_motion_cam(obj)
+    if snapshot is None:
+        raise ValueError(f'{obj.name}: motion path needs at least two cameras')
+
+    frames = get_bake_frames(frame_start, frame_end, frame_step)
+    if shutter_samples > 1:
+        render = (scene or bpy.context.scene).render
+        frames = get_shutter_frames(frames,
+                                    render.motion_blur_shutter,
+                                    getattr(render, 'motion_blur_position', 'CENTER'),
+                                    shutter_samples)
+    factors = np.empty(len(frames))
+    chunk = 256
+    for start in range(0, len(frames), chunk):
+        factors[start:start + chunk] = [fcurve.evaluate(f) for f in frames[start:start + chunk]]
+        if progress:
+            progress(min(start + chunk, len(frames)) / len(frames))
+
+    return cam, frames, factors, snapshot
+
+
+def bake_motion_camera(obj, frame_start: float, frame_end: float, frame_step: float = 1,
+                       collection=None, progress=None,
+                       tolerances: "dict[str, float] | None" = None,
+                       shutter_samples: int = 1, scene=None) -> tuple[bpy.types.Object, int, int]:
+    """同步烘焙运动相机, 不依赖窗口, 可用于后台(blender -b)脚本
+
+    :param obj: 运动相机物体
+    :param collection: 烘焙相机所在集合, 默认为当前集合
+    :param progress: 进度回调, 参数为0-1
+    :param tolerances: 关键帧精简误差, 见write_bake_keys
+    :param shutter_samples: 每帧在快门区间内的采样数量, 快门取自scene的运动模糊设置
+    :param scene: 默认为当前场景
+    :return: (烘焙得到的相机物体, 精简前关键帧数量, 精简后关键帧数量)
+    """
+    cam, frames, factors, snapshot = get_bake_samples_input(
+        obj, frame_start, frame_end, frame_step, shutter_samples, scene,
+        progress=(lambda fac: progress(0.5 * fac)) if progress else None)
+
+    samples = evaluate_motion_cam_snapshot(snapshot, factors)
+
+    ob = new_bake_camera(collection or bpy.context.collection, cam)
+    count, count_decimated = write_bake_keys(ob, frames, samples, obj.motion_cam.affect, obj.rotation_mode,
+                                             tolerances=tolerances)
+    if progress:
+        progress(1)
+    return ob, count, count_decimated
+
+
+def is_motion_cam(obj) -> bool:
+    return obj.type in {'EMPTY', 'CAMERA'} and len(obj.motion_cam.list) > 1
+
+
+def bake_all_motion_cameras(objects, collection=None, progress=None,
+                            tolerances: "dict[str, float] | None" = None,
+                            shutter_samples: int = 1, scene=None,
+                            max_workers: "int | None" = None,
+                            frame_step: float = 1) -> tuple[list, list[str]]:
+    """烘焙多个运动相机
+    F曲线求值与关键帧写入访问RNA, 只能在主线程进行;
+    路径求值/欧拉角转换/关键帧精简只使用数组, 在线程池中并行(numpy释放GIL)
+
+    :param objects: 运动相机物体, 帧范围取自各自的动作
+    :param max_workers: 线程数量, 默认为cpu数量
+    :param frame_step: 采样间隔(帧), 可以为小数
+    :return: ([(物体, 烘焙相机, 精简前关键帧数量, 精简后关键帧数量)], [跳过的原因])
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    jobs = []
+    skipped = []
+    objects = list(objects)
+    for i, obj in enumerate(objects):
+        action = obj.animation_data.action if obj.animation_data else None
+        if action is None:
+            skipped.append(f'{obj.name}: no action')
+            continue
+        frame_start, frame_end = action.frame_range
+        try:
+            cam, frames, factors, snapshot = get_bake_samples_input(obj, frame_start, frame_end, frame_step,
+                                                                    shutter_samples, scene)
+        except ValueError as e:
+            skipped.append(str(e))
+        else:
+            rotation_mode = get_bake_rotation_mode(obj.rotation_mode)
+            jobs.append((obj, cam, frames, factors, snapshot, get_bake_flags(obj.motion_cam.affect), rotation_mode))
+        if progress:
+            progress(0.3 * (i + 1) / len(objects))
+
+    if not jobs:
+        return [], skipped
+
+    def prepare(job):
+        _obj, _cam, frames, factors, snapshot, flags, rotation_mode = job
+        samples = evaluate_motion_cam_snapshot(snapshot, factors)
+        return prepare_bake_keys(frames, samples, flags, rotation_mode, tolerances)
+
+    with ThreadPoolExecutor(max_workers=max_workers or min(len(jobs), os.cpu_count() or 1)) as pool:
+        all_keys = list(pool.map(prepare, jobs))
+
+    results = []
+    for i, ((obj, cam, frames, _factors, _snapshot, _flags, rotation_mode), keys) in enumerate(zip(jobs, all_keys)):
+        ob = new_bake_camera(collection or bpy.context.collection, cam)
+        count_decimated = write_prepared_keys(ob, keys, rotation_mode)
+        results.append((obj, ob, len(frames) * len(keys), count_decimated))
+        if progress:
+            progress(0.3 + 0.7 * (i + 1) / len(jobs))
+    return results, skipped
+
+
+class BakeOptions:
+    """烘焙步长/快门采样/关键帧精简的公共属性"""
+    frame_step: FloatProperty(name="Frame Step", default=1, min=0.01, soft_max=10)
+    shutter_samples: IntProperty(name="Shutter Samples", default=1, min=1, soft_max=16,
+                                 description='Samples per frame across the motion blur shutter, '
+                                             'keyed at sub-frames, ignored in Scene mode')
+
+    use_decimate: BoolProperty(name="Reduce Keyframes", default=False,
+                               description='Remove baked keys that linear interpolation reproduces within tolerance')
+    tolerance_location: FloatProperty(name="Location Tolerance", default=0.001, min=0, subtype='DISTANCE',
+                                      description='Location and focus distance error')
+    tolerance_rotation: FloatProperty(name="Rotation Tolerance", default=math.radians(0.05), min=0,
+                                      subtype='ANGLE')
+    tolerance_lens: FloatProperty(name="Lens Tolerance", default=0.01, min=0,
+                                  description='Focal length and F-Stop error')
+
+    def get_tolerances(self) -> "dict[str, float] | None":
+        """关键帧精简误差, 见write_bake_keys, 未开启精简时为None"""
+        if not self.use_decimate:
+            return None
+        return {
+            'location': self.tolerance_location,
+            'rotation': self.tolerance_rotation,
+            'lens': self.tolerance_lens,
+        }
+
+
 # bake motion camera
-class CAMHP_OT_bake_motion_cam(bpy.types.Operator):
+class CAMHP_OT_bake_motion_cam(BakeOptions, bpy.types.Operator):
     bl_idname = "camhp.bake_motion_cam"
     bl_label = "Bake Motion Camera"
+    bl_options = {'REGISTER', 'UNDO'}
 
     frame_start: IntProperty(name="Start Frame", default=1)
     frame_end: IntProperty(name="End Frame", default=100)
-    frame_step: IntProperty(name="Frame Step", default=1)
+
+    bake_mode: EnumProperty(name="Mode",
+                            items=[
+                                ('DIRECT', 'Direct',
+                                 'Evaluate the offset factor F-Curve and the motion path directly, '
+                                 'without changing the scene frame'),
+                                ('SCENE', 'Scene', 'Step through the scene frames and read back the result'),
+                            ],
+                            default='DIRECT')
 
     # bake
     cam = None
@@ -25,13 +401,14 @@ class CAMHP_OT_bake_motion_cam(bpy.types.Operator):
             else:
                 self.frame += self.frame_step
 
-            context.scene.frame_set(self.frame)
+            # 小数帧需要显式传入frame, 否则关键帧都插在整数帧上互相覆盖
+            context.scene.frame_set(int(self.frame), subframe=self.frame % 1)
             matrix = context.object.matrix_world.copy()
             print('frame', self.frame, matrix)
             # 位置
             loc = matrix.to_translation()
             ob.location = loc
-            ob.keyframe_insert('location')
+            ob.keyframe_insert('location', frame=self.frame)
 
             if affect.use_euler:
                 if self.euler_prev is None:
@@ -41,21 +418,24 @@ class CAMHP_OT_bake_motion_cam(bpy.types.Operator):
                 self.euler_prev = euler.copy()
 
                 ob.rotation_euler = self.euler_prev
-                ob.keyframe_insert('rotation_euler')
+                ob.keyframe_insert('rotation_euler', frame=self.frame)
 
             if not cam: return {'PASS_THROUGH'}
-            # 相机数值
+            # 相机数值, 帧切换时已求值过的factor直接从缓存读取
+            state = evaluate_motion_cam(context.object, context.object.motion_cam.offset_factor)
+            if state is None: return {'PASS_THROUGH'}
+
             if affect.use_lens:
-                ob.data.lens = G_PROPS['lens']
-                ob.data.keyframe_insert('lens')
+                ob.data.lens = state.lens
+                ob.data.keyframe_insert('lens', frame=self.frame)
 
             if affect.use_focus_distance:
-                ob.data.dof.focus_distance = G_PROPS['focal']
-                ob.data.dof.keyframe_insert('focus_distance')
+                ob.data.dof.focus_distance = state.focal
+                ob.data.dof.keyframe_insert('focus_distance', frame=self.frame)
 
             if affect.use_aperture_fstop:
-                ob.data.dof.aperture_fstop = G_PROPS['fstop']
-                ob.data.dof.keyframe_insert('aperture_fstop')
+                ob.data.dof.aperture_fstop = state.fstop
+                ob.data.dof.keyframe_insert('aperture_fstop', frame=self.frame)
 
             # 自定义属性
             # for item in affect.custom_props:
@@ -91,22 +471,47 @@ class CAMHP_OT_bake_motion_cam(bpy.types.Operator):
 
         return {'PASS_THROUGH'}
 
+    def execute(self, context):
+        obj = context.object
+        if obj is None:
+            self.report({'ERROR'}, "无物体")
+            return {'CANCELLED'}
+
+        # 未指定帧范围时使用动作的帧范围
+        action = obj.animation_data.action if obj.animation_data else None
+        if action and not self.properties.is_property_set('frame_start'):
+            self.frame_start = int(action.frame_range[0])
+        if action and not self.properties.is_property_set('frame_end'):
+            self.frame_end = int(action.frame_range[1])
+
+        wm = context.window_manager
+        wm.progress_begin(0, 100)
+        try:
+            ob, count, count_decimated = bake_motion_camera(obj, self.frame_start, self.frame_end, self.frame_step,
+                                                            collection=context.collection,
+                                                            progress=lambda fac: wm.progress_update(fac * 100),
+                                                            tolerances=self.get_tolerances(),
+                                                            shutter_samples=self.shutter_samples,
+                                                            scene=context.scene)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        finally:
+            wm.progress_end()
+
+        self.report({'INFO'}, f'Baked {ob.name}: {count} -> {count_decimated} keys')
+        return {'FINISHED'}
+
     def invoke(self, context, event):
+        if self.bake_mode == 'DIRECT':
+            return self.execute(context)
+
         # print('invoke')
         wm = context.window_manager
         m_cam = context.object.motion_cam
         affect = m_cam.affect
 
-        if context.object.type == 'CAMERA':
-            cam = context.object
-        elif (affect.use_sub_camera and
-              affect.sub_camera and
-              affect.sub_camera.type == 'CAMERA'):
-
-            cam = affect.sub_camera
-        else:
-            cam = None
-
+        cam = get_bake_camera(context.object)
         if cam is None:
             self.report({'ERROR'}, "无相机")
             return {'CANCELLED'}
@@ -124,26 +529,67 @@ class CAMHP_OT_bake_motion_cam(bpy.types.Operator):
         self.frame_start = int(action.frame_range[0])
         self.frame_end = int(action.frame_range[1])
 
-        name = cam.name + '_bake'
-        data_name = cam.data.name + '_bake'
-        # print(name, data_name)
-        cam_data = bpy.data.cameras.new(name=data_name)
-        ob = bpy.data.objects.new(name, cam_data)
-        # ob.constraints.clear()
-        # ob.location = 0, 0, 0
+        ob = new_bake_camera(context.collection, cam)
 
-        context.collection.objects.link(ob)
-
-        context.scene.frame_set(self.frame_start)
-
-        self.frame = self.frame_start
         self.cam = cam
         self.cam_bake = ob
         self.affect = affect
         self.euler_prev = None
+
+        context.scene.frame_set(self.frame_start)
+
+        self.frame = self.frame_start
         # print('invoke end')
         self.timer = wm.event_timer_add(0.01, window=context.window)
         context.window_manager.modal_handler_add(self)
         return {"RUNNING_MODAL"}
         # return wm.invoke_props_dialog(self)
 
+
+class CAMHP_OT_bake_all_motion_cams(BakeOptions, bpy.types.Operator):
+    """Bake every motion camera in the scene over its action frame range"""
+    bl_idname = "camhp.bake_all_motion_cams"
+    bl_label = "Bake All Motion Cameras"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        objects = [obj for obj in context.scene.objects if is_motion_cam(obj)]
+        if not objects:
+            self.report({'ERROR'}, "无运动相机")
+            return {'CANCELLED'}
+
+        wm = context.window_manager
+        wm.progress_begin(0, 100)
+        try:
+            results, skipped = bake_all_motion_cameras(objects,
+                                                       collection=context.collection,
+                                                       progress=lambda fac: wm.progress_update(fac * 100),
+                                                       tolerances=self.get_tolerances(),
+                                                       shutter_samples=self.shutter_samples,
+                                                       scene=context.scene,
+                                                       frame_step=self.frame_step)
+        finally:
+            wm.progress_end()
+
+        for msg in skipped:
+            self.report({'WARNING'}, msg)
+        count = sum(res[2] for res in results)
+        count_decimated = sum(res[3] for res in results)
+        self.report({'INFO'}, f'Baked {len(results)} motion cameras: {count} -> {count_decimated} keys')
+        return {'FINISHED'}
+
+
+register_class, unregister_class = bpy.utils.register_classes_factory(
+    (
+        CAMHP_OT_bake_motion_cam,
+        CAMHP_OT_bake_all_motion_cams,
+    )
+)
+
+
+def register():
+    register_class()
+
+
+def unregister():
+    unregister_class()
@@ -0,0 +1,38 @@
+"""Keyframe reduction for baked channels
+
+Works on plain frame/value arrays so it can run in the bake thread pool.
+"""
+import numpy as np
+
+
+def decimate_keys(frames: np.ndarray, values: np.ndarray, tolerance: float) -> np.ndarray:
+    """Ramer-Douglas-Peucker 关键帧精简, 误差为线性插值在同一帧上的偏差
+
+    :param frames: (n,)
+    :param values: (n,) / (n, k) 同一组通道一起精简, 误差取向量长度
+    :param tolerance: 允许的最大误差
+    :return: (n,) bool 需要保留的关键帧
+    """
+    count = len(frames)
+    keep = np.zeros(count, dtype=bool)
+    if count == 0:
+        return keep
+    keep[0] = keep[-1] = True
+
+    values = np.asarray(values, dtype=np.float64).reshape(count, -1)
+    stack = [(0, count - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        t = (frames[a + 1:b] - frames[a]) / (frames[b] - frames[a])
+        interp = values[a] + (values[b] - values[a]) * t[:, None]
+        error = np.linalg.norm(values[a + 1:b] - interp, axis=1)
+
+        i = int(np.argmax(error))
+        if error[i] > tolerance:
+            index = a + 1 + i
+            keep[index] = True
+            stack.append((a, index))
+            stack.append((index, b))
+    return keep
@@ -0,0 +1,199 @@
+"""Camera property interpolation kernel
+
+Endpoint quaternions and camera values of every path segment are precomputed once into arrays;
+evaluation works on a (segment, local factor) pair or on arrays of them and returns a CamState
+instead of writing module globals. No mathutils objects are created while evaluating.
+"""
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+# 线性插值的相机数值, 与CamState字段对应
+C_KERNEL_CHANNELS = ('lens', 'fstop', 'focal')
+# 夹角过小时slerp退化为线性插值
+C_SLERP_EPSILON = 1e-4
+# blender mat3_normalized_to_eul2 的阈值
+C_EULER_EPSILON = 16 * 1.1920929e-07
+
+
+def slerp_array(q0: np.ndarray, q1: np.ndarray, fac: np.ndarray) -> np.ndarray:
+    """批量四元数球面插值(最短路径, 与Quaternion.slerp一致)
+
+    :param q0: (n, 4) w, x, y, z
+    :param q1: (n, 4)
+    :param fac: (n,)
+    :return: (n, 4)
+    """
+    fac = np.asarray(fac, dtype=np.float64)[:, None]
+    dot = np.sum(q0 * q1, axis=1, keepdims=True)
+    q1 = np.where(dot < 0, -q1, q1)
+    dot = np.clip(np.abs(dot), 0.0, 1.0)
+
+    theta = np.arccos(dot)
+    sin_theta = np.sin(theta)
+    near = sin_theta < C_SLERP_EPSILON
+    safe_sin = np.where(near, 1.0, sin_theta)
+
+    w0 = np.where(near, 1 - fac, np.sin((1 - fac) * theta) / safe_sin)
+    w1 = np.where(near, fac, np.sin(fac * theta) / safe_sin)
+    quat = w0 * q0 + w1 * q1
+    return quat / np.linalg.norm(quat, axis=1, keepdims=True)
+
+
+def quaternion_to_euler_array(quat: np.ndarray) -> np.ndarray:
+    """四元数转为XYZ欧拉角, 与Quaternion.to_euler()结果一致
+
+    :param quat: (n, 4) w, x, y, z
+    :return: (n, 3)
+    """
+    quat = np.asarray(quat, dtype=np.float64).reshape(-1, 4)
+    q = quat / np.linalg.norm(quat, axis=1, keepdims=True) * math.sqrt(2)
+    w, x, y, z = q.T
+
+    # quat_to_mat3, m_ij 为第i列第j行
+    m00 = 1 - y * y - z * z
+    m01 = w * z + x * y
+    m02 = -w * y + x * z
+    m11 = 1 - x * x - z * z
+    m12 = w * x + y * z
+    m21 = -w * x + y * z
+    m22 = 1 - x * x - y * y
+
+    cy = np.hypot(m00, m01)
+    regular = cy > C_EULER_EPSILON
+    euler1 = np.stack((np.where(regular, np.arctan2(m12, m22), np.arctan2(-m21, m11)),
+                       np.arctan2(-m02, cy),
+                       np.where(regular, np.arctan2(m01, m00), 0.0)), axis=1)
+    euler2 = np.stack((np.where(regular, np.arctan2(-m12, -m22), euler1[:, 0]),
+                       np.where(regular, np.arctan2(-m02, -cy), euler1[:, 1]),
+                       np.where(regular, np.arctan2(-m01, -m00), 0.0)), axis=1)
+
+    # 取旋转量较小的一组解
+    use_second = np.abs(euler1).sum(axis=1) > np.abs(euler2).sum(axis=1)
+    return np.where(use_second[:, None], euler2, euler1)
+
+
+def quaternion_to_euler(quat) -> tuple[float, float, float]:
+    """单个四元数转为XYZ欧拉角, 标量版本避免numpy调用开销"""
+    w, x, y, z = quat
+    scale = math.sqrt(2) / math.sqrt(w * w + x * x + y * y + z * z)
+    w, x, y, z = w * scale, x * scale, y * scale, z * scale
+
+    m00 = 1 - y * y - z * z
+    m01 = w * z + x * y
+    m02 = -w * y + x * z
+    m11 = 1 - x * x - z * z
+    m12 = w * x + y * z
+    m21 = -w * x + y * z
+    m22 = 1 - x * x - y * y
+
+    cy = math.hypot(m00, m01)
+    if cy <= C_EULER_EPSILON:
+        return math.atan2(-m21, m11), math.atan2(-m02, cy), 0.0
+
+    euler1 = (math.atan2(m12, m22), math.atan2(-m02, cy), math.atan2(m01, m00))
+    euler2 = (math.atan2(-m12, -m22), math.atan2(-m02, -cy), math.atan2(-m01, -m00))
+    if sum(map(abs, euler1)) > sum(map(abs, euler2)):
+        return euler2
+    return euler1
+
+
+@dataclass
+class CamState:
+    """插值结果, 标量求值时为float/tuple, 批量求值时为数组(第一维对应输入)"""
+    quaternion: "tuple[float, float, float, float] | np.ndarray"  # w, x, y, z
+    lens: "float | np.ndarray"
+    fstop: "float | np.ndarray"
+    focal: "float | np.ndarray"
+
+    @property
+    def euler(self):
+        """XYZ欧拉角"""
+        if isinstance(self.quaternion, np.ndarray):
+            return quaternion_to_euler_array(self.quaternion)
+        return quaternion_to_euler(self.quaternion)
+
+
+class CamKernel:
+    """按段预计算的插值数据
+
+    第i段在第i与i+1个来源相机之间; 终点四元数已翻转到起点所在半球, slerp所需的夹角也已算好.
+    """
+
+    def __init__(self, quaternion, lens, fstop, focal):
+        quaternion = np.asarray(quaternion, dtype=np.float64).reshape(-1, 4)
+        quaternion = quaternion / np.linalg.norm(quaternion, axis=1, keepdims=True)
+        values = np.stack([np.asarray(v, dtype=np.float64).ravel() for v in (lens, fstop, focal)], axis=1)
+
+        q0 = quaternion[:-1]
+        q1 = quaternion[1:]
+        dot = np.sum(q0 * q1, axis=1)
+        q1 = np.where(dot[:, None] < 0, -q1, q1)
+        theta = np.arccos(np.clip(np.abs(dot), 0.0, 1.0))
+        sin_theta = np.sin(theta)
+
+        self.q0 = q0
+        self.q1 = q1
+        self.theta = theta
+        self.sin_theta = sin_theta
+        self.start = values[:-1]  # (n - 1, 3)
+        self.delta = values[1:] - values[:-1]
+
+        # 标量求值直接读取python列表, 比索引numpy数组快
+        self._segments = list(zip(q0.tolist(), q1.tolist(), theta.tolist(), sin_theta.tolist(),
+                                  self.start.tolist(), self.delta.tolist()))
+
+    @classmethod
+    def from_snapshot(cls, cameras: dict[str, np.ndarray]) -> "CamKernel":
+        """由snapshot_motion_cameras的结果构建"""
+        return cls(cameras['quaternion'], cameras['lens'], cameras['fstop'], cameras['focal'])
+
+    def __len__(self):
+        return len(self._segments)
+
+    def evaluate(self, segment: int, fac: float) -> CamState:
+        """标量求值
+
+        :param segment: 段索引
+        :param fac: 段内的局部factor 0..1
+        """
+        q0, q1, theta, sin_theta, start, delta = self._segments[segment]
+
+        if sin_theta < C_SLERP_EPSILON:
+            w0, w1 = 1 - fac, fac
+        else:
+            w0 = math.sin((1 - fac) * theta) / sin_theta
+            w1 = math.sin(fac * theta) / sin_theta
+        quat = [w0 * a + w1 * b for a, b in zip(q0, q1)]
+        norm = math.sqrt(sum(v * v for v in quat))
+
+        return CamState(
+            quaternion=tuple(v / norm for v in quat),
+            lens=start[0] + delta[0] * fac,
+            fstop=start[1] + delta[1] * fac,
+            focal=start[2] + delta[2] * fac,
+        )
+
+    def evaluate_array(self, segment: np.ndarray, fac: np.ndarray) -> CamState:
+        """批量求值
+
+        :param segment: (n,) 段索引
+        :param fac: (n,) 段内的局部factor
+        """
+        segment = np.asarray(segment, dtype=np.int64)
+        fac = np.asarray(fac, dtype=np.float64)
+        f = fac[:, None]
+
+        theta = self.theta[segment][:, None]
+        sin_theta = self.sin_theta[segment][:, None]
+        near = sin_theta < C_SLERP_EPSILON
+        safe_sin = np.where(near, 1.0, sin_theta)
+        w0 = np.where(near, 1 - f, np.sin((1 - f) * theta) / safe_sin)
+        w1 = np.where(near, f, np.sin(f * theta) / safe_sin)
+
+        quat = w0 * self.q0[segment] + w1 * self.q1[segment]
+        quat /= np.linalg.norm(quat, axis=1, keepdims=True)
+        values = self.start[segment] + self.delta[segment] * f
+
+        return CamState(quaternion=quat, lens=values[:, 0], fstop=values[:, 1], focal=values[:, 2])
@@ -1,16 +1,46 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+
 import bpy
+import gpu
+import numpy as np
+from bpy.app.handlers import persistent
 from bpy.props import CollectionProperty, PointerProperty, FloatProperty, IntProperty, StringProperty, BoolProperty, \
     EnumProperty
 from bpy.types import PropertyGroup, Operator, Panel, UIList
+from gpu_extras.batch import batch_for_shader
+
+from ..old.utils import gen_bezier_curve_from_points, gen_sample_attr_obj, gen_sample_mesh_obj, remove_sample_obj
+from ..old.utils import fill_curve_data, update_curve_points
+from ..old.utils import meas_time
+from .add import CAMHP_PT_add_motion_cams
+from .kernel import CamKernel, CamState
+from .order import nearest_neighbour_order, two_opt_order
+from . import path_edit
+from .path import MotionPath
+from ...utils import get_pref
 
-from ops.old.utils import gen_bezier_curve_from_points, gen_sample_attr_obj, gen_sample_mesh_obj
-from ops.old.utils import meas_time, get_mesh_obj_attrs
-
-C_ATTR_FAC = 'factor'
-C_ATTR_LENGTH = 'length'
 G_STATE_UPDATE = False  # 用于保护曲线更新的状态
-# 绕过blender更新bug
-G_PROPS = {}
+# 每个物体的求值结果缓存 {obj.as_pointer(): (version, OrderedDict{factor: CamState})}, 最近使用的在末尾
+G_EVAL_CACHE = {}
+G_EVAL_STATS = {'hits': 0, 'misses': 0}
+C_EVAL_CACHE_SIZE = 256  # 每个物体保留的结果数量
+C_EVAL_FACTOR_DIGITS = 9  # factor取整位数, 用于缓存键
+# 路径缓存 {obj.as_pointer(): (version, MotionPath)}
+G_PATH_CACHE = {}
+# 缓存版本 {obj.as_pointer(): int}, 来源相机变化或重建路径时增加, 命中缓存时不读取任何相机
+G_MOTION_VERSION = {}
+# 来源数据 -> 运动相机 {id.as_pointer(): {obj.as_pointer()}}, 来源为相机及其父级/相机数据/对焦物体
+G_MOTION_SOURCES = {}
+# 运动相机 -> 来源数据 {obj.as_pointer(): {id.as_pointer()}}
+G_MOTION_SOURCE_IDS = {}
+# 来源带有动画或约束的运动相机, 帧切换时增加版本
+G_MOTION_ANIMATED = set()
+# 插值核缓存 {obj.as_pointer(): (version, CamKernel)}
+G_KERNEL_CACHE = {}
+# NUMPY模式下代替几何节点物体绘制的路径 {obj.as_pointer(): (version, GPUBatch)}
+G_PATH_BATCHES = {}
+G_PATH_DRAW_HANDLE = {'handle': None}
 
 
 def parse_data_path(src_obj, scr_data_path):
@@ -49,192 +79,293 @@ def get_active_motion_item(obj):
         return obj.motion_cam.list[obj.motion_cam.list_index]
 
 
-def mix_value(val1, val2, fac):
-    return (1 - fac) * val1 + fac * val2
+def get_affect_camera(tg_obj):
+    """受影响的相机: 子级相机或物体自身, 都不是时返回None"""
+    affect = tg_obj.motion_cam.affect
+    if affect.use_sub_camera and affect.sub_camera and affect.sub_camera.type == 'CAMERA':
+        return affect.sub_camera
+    elif tg_obj.type == 'CAMERA':
+        return tg_obj
 
 
-def get_interpolate_euler(from_obj, to_obj, fac):
-    from_quart = from_obj.matrix_world.to_quaternion().copy()
-    to_quart = to_obj.matrix_world.to_quaternion().copy()
-    return from_quart.slerp(to_quart, fac).to_euler()
+def apply_cam_state(tg_obj, state: CamState, use_camera: bool = True):
+    """将插值结果写入物体
 
+    :param tg_obj: 运动相机物体
+    :param state: CamKernel.evaluate 的结果
+    :param use_camera: 来源是否都为相机, 否则只影响旋转
+    """
+    affect = tg_obj.motion_cam.affect
 
-def get_interpolate_lens(from_obj, to_obj, fac):
-    G_PROPS['lens'] = mix_value(from_obj.data.lens, to_obj.data.lens, fac)
-    return G_PROPS['lens']
+    # 限定变化, 位置变化由曲线约束
+    if affect.use_euler:
+        tg_obj.rotation_euler = state.euler
 
+    cam = get_affect_camera(tg_obj)
+    if cam is None or not use_camera: return
 
-def get_interpolate_fstop(from_obj, to_obj, fac):
-    G_PROPS['fstop'] = mix_value(from_obj.data.dof.aperture_fstop, to_obj.data.dof.aperture_fstop, fac)
-    return G_PROPS['fstop']
+    if affect.use_lens:
+        cam.data.lens = state.lens
+    if affect.use_aperture_fstop:
+        cam.data.dof.aperture_fstop = state.fstop
+    if affect.use_focus_distance:
+        cam.data.dof.focus_distance = state.focal
 
 
-def get_interpolate_focal(from_obj, to_obj, fac):
-    def get_focus_dis(cam):
-        dis = cam.data.dof.focus_distance
-        obj = cam.data.dof.focus_object
-        if obj:
-            get_loc = lambda ob: ob.matrix_world.translation
-            dis = get_loc(obj).dist(get_loc(cam))
+def get_focus_distance(cam) -> float:
+    dis = cam.data.dof.focus_distance
+    obj = cam.data.dof.focus_object
+    if obj:
+        dis = obj.matrix_world.translation.dist(cam.matrix_world.translation)
+    return dis
 
-        return dis
 
-    G_PROPS['focal'] = mix_value(get_focus_dis(from_obj), get_focus_dis(to_obj), fac)
-    return G_PROPS['focal']
+def snapshot_motion_cameras(cam_list) -> dict[str, np.ndarray]:
+    """一次性读取来源相机数据, 之后的插值不再访问RNA
 
+    :param cam_list: list of bpy.types.Object
+    :return: dict of arrays
+    """
+    count = len(cam_list)
+    quaternion = np.empty((count, 4))
+    lens = np.empty(count)
+    fstop = np.empty(count)
+    focal = np.empty(count)
+
+    for i, cam in enumerate(cam_list):
+        quaternion[i] = cam.matrix_world.to_quaternion()
+        lens[i] = cam.data.lens
+        fstop[i] = cam.data.dof.aperture_fstop
+        focal[i] = get_focus_distance(cam)
+
+    return {'quaternion': quaternion, 'lens': lens, 'fstop': fstop, 'focal': focal}
+
+
+@dataclass
+class MotionCamSamples:
+    """evaluate_motion_cam_batch的结果, 每个数组的第一维对应输入的factor"""
+    factor: np.ndarray
+    location: np.ndarray  # (n, 3)
+    quaternion: np.ndarray  # (n, 4) w, x, y, z
+    lens: np.ndarray
+    fstop: np.ndarray
+    focal: np.ndarray
+
+    def __len__(self):
+        return len(self.factor)
+
+
+@dataclass
+class MotionCamSnapshot:
+    """运动相机求值所需的全部数据, 只包含数组, 可以在其他线程中求值"""
+    motion_path: MotionPath
+    cameras: dict[str, np.ndarray]
+    offset: np.ndarray  # (3,) 物体自身(约束前)的世界位移
+
+
+def get_base_translation(obj) -> np.ndarray:
+    """约束前的世界位移, 包含父级变换
+    matrix_world 已包含跟随路径约束的结果, 不能直接使用
+    """
+    matrix = obj.matrix_basis
+    if obj.parent is not None:
+        matrix = obj.parent.matrix_world @ obj.matrix_parent_inverse @ matrix
+    return np.array(matrix.translation)
 
-def interpolate_cam(tg_obj, from_obj, to_obj, fac):
-    """用于切换相机的插值
 
-    :param tg_obj:
-    :param from_obj:
-    :param to_obj:
-    :param fac:
-    :return:
-    """
-    affect = tg_obj.motion_cam.affect
-    use_euler = affect.use_euler
+def snapshot_motion_cam(obj) -> "MotionCamSnapshot | None":
+    """读取运动相机求值所需的数据(需要在主线程调用)"""
+    cam_list = get_motion_cameras(obj)
+    motion_path = get_motion_path(obj, cam_list)
+    if motion_path is None: return
 
-    use_sub_camera = affect.use_sub_camera
+    # 路径由相机的世界位置构建, hook修改器抵消了路径物体的变换, 不需要再乘路径矩阵
+    return MotionCamSnapshot(
+        motion_path=motion_path,
+        cameras=snapshot_motion_cameras(cam_list),
+        offset=get_base_translation(obj),
+    )
 
-    use_lens = affect.use_lens
-    use_aperture_fstop = affect.use_aperture_fstop
-    use_focus_distance = affect.use_focus_distance
 
-    # 限定变化, 位置变化由曲线约束
-    if use_euler:
-        tg_obj.rotation_euler = get_interpolate_euler(from_obj, to_obj, fac)
+def evaluate_motion_cam_snapshot(snapshot: MotionCamSnapshot, factors: np.ndarray) -> MotionCamSamples:
+    """根据快照批量求值, 不访问bpy数据"""
+    motion_path = snapshot.motion_path
+    cameras = snapshot.cameras
 
-    # 子级为相机
-    if use_sub_camera and affect.sub_camera and affect.sub_camera.type == 'CAMERA':
-        cam = affect.sub_camera
-    elif tg_obj.type == 'CAMERA':
-        cam = tg_obj
-    else:
-        cam = None
-
-    # print(cam)
-    if cam is None: return
-
-    # 相机变化
-    if from_obj.type == to_obj.type == 'CAMERA':
-        # is_sub_camera
-        if use_lens:
-            cam.data.lens = get_interpolate_lens(from_obj, to_obj, fac)
-        if use_aperture_fstop:
-            cam.data.dof.aperture_fstop = get_interpolate_fstop(from_obj, to_obj, fac)
-        if use_focus_distance:
-            cam.data.dof.focus_distance = get_interpolate_focal(from_obj, to_obj, fac)
-
-    # # 自定义
-    # for item in affect.custom_props:
-    #     if item.data_path == '': continue
-    #
-    #     src_obj, src_attr = parse_data_path(cam.data, item.data_path)
-    #     _from_obj, from_attr = parse_data_path(from_obj.data, item.data_path)
-    #     _to_obj, to_attr = parse_data_path(to_obj.data, item.data_path)
-    #     if from_attr is None or to_attr is None or src_attr is None: continue
-    #
-    #     from_value = getattr(_from_obj, from_attr)
-    #     to_value = getattr(_to_obj, to_attr)
-    #
-    #     try:
-    #         if isinstance(from_value, float):
-    #             setattr(src_obj, src_attr, mix_value(from_value, to_value, fac))
-    #         elif isinstance(from_value, mathutils.Vector):
-    #             setattr(src_obj, src_attr, from_value.copy().lerp(to_value, fac))
-    #         elif isinstance(from_value, mathutils.Matrix):
-    #             setattr(src_obj, src_attr, from_value.copy().lerp(to_value, fac))
-    #         elif isinstance(from_value, bool):
-    #             setattr(src_obj, src_attr, from_value)
-    #         elif isinstance(from_value, bpy.types.Object):
-    #             setattr(src_obj, src_attr, from_value)
-    #     except Exception as e:
-    #         print(e)
+    factors = np.clip(np.asarray(factors, dtype=np.float64).ravel(), 0, 1)
+    seg, fac = motion_path.locate_array(factors)
 
+    location = motion_path.position_array(factors) + snapshot.offset
+    state = CamKernel.from_snapshot(cameras).evaluate_array(seg, fac)
 
-def gen_cam_path(self, context):
-    """生成相机路径曲线
+    return MotionCamSamples(
+        factor=factors,
+        location=location,
+        quaternion=state.quaternion,
+        lens=state.lens,
+        fstop=state.fstop,
+        focal=state.focal,
+    )
 
-    :param self:`
-    :param contexnt: m
-    :return:
-    """
 
-    @meas_time
-    def process():
-        obj = self.id_data
-        cam_list = list()
-        for item in obj.motion_cam.list:
-            if item.camera is not None:
-                cam_list.append(item.camera)
+def evaluate_motion_cam_batch(obj, factors: np.ndarray) -> "MotionCamSamples | None":
+    """批量求值运动相机, 用于烘焙/路径绘制/分析
 
-        if len(cam_list) < 2: return
+    位置为曲线上的点加上物体自身的位移(与跟随路径约束一致)
+
+    :param obj: 运动相机物体
+    :param factors: offset_factor 数组
+    :return: MotionCamSamples / None
+    """
+    snapshot = snapshot_motion_cam(obj)
+    if snapshot is None: return
+    return evaluate_motion_cam_snapshot(snapshot, factors)
 
-        cam_pts = [cam.matrix_world.translation for cam in cam_list]
-        path = gen_bezier_curve_from_points(coords=cam_pts,
-                                            type=obj.motion_cam.path_type,
-                                            curve_name=obj.name + '-MotionPath',
-                                            resolution_u=12)
 
-        # 生成hook修改器(用于接受动画曲线的输入)
+def gen_path_hooks(path, cam_list, path_type, indices=None):
+    """生成hook修改器(用于接受动画曲线的输入)
+
+    :param indices: 只更新这些相机的hook, 为None时重建全部
+    """
+    if indices is None:
         path.modifiers.clear()
+        names = []
         for i, cam in enumerate(cam_list):
-            # print(cam.name)
             hm = path.modifiers.new(
                 name=f"Hook_{i}",
                 type='HOOK',
             )
-            if i == 0:  # bug,使用强制更新
+            if i == 0:  # bug,使用强制更新. 第二个修改器会被重命名为Hook_0.001
                 hm = path.modifiers.new(
                     name=f"Hook_{i}",
                     type='HOOK',
                 )
-            if obj.motion_cam.path_type == 'SMOOTH':
+            if path_type == 'SMOOTH':
                 hm.vertex_indices_set([i * 3, i * 3 + 1, i * 3 + 2])  # 跳过手柄点
             else:
                 hm.vertex_indices_set([i])
             hm.object = cam
+            names.append(hm.name)
+        # 记录实际名称, 增量更新时按名称查找持有顶点的修改器
+        path['motion_cam_hooks'] = names
+        return
 
-        # 生成用于采样/绘制的网格数据
-        path_attr = gen_sample_attr_obj(path)
-        path_mesh = gen_sample_mesh_obj(path)
-        # 设置
-        obj.motion_cam.path = path
-        obj.motion_cam.path_attr = path_attr
-        obj.motion_cam.path_mesh = path_mesh
+    names = path['motion_cam_hooks']
+    for i in indices:
+        # 设置物体时会重置hook的逆矩阵
+        path.modifiers[names[i]].object = cam_list[i]
 
-        # 约束
-        if 'Motion Camera' in obj.constraints:
-            const = obj.constraints['Motion Camera']
-            obj.constraints.remove(const)
 
-        const = obj.constraints.new('FOLLOW_PATH')
-        const.name = 'Motion Camera'
+def ensure_path_constraint(obj, path):
+    """跟随路径约束, 目标未变化时复用"""
+    const = obj.constraints.get('Motion Camera')
+    if const is not None and const.target == path and obj.animation_data and \
+            obj.animation_data.drivers.find('constraints["Motion Camera"].offset_factor'):
+        return const
 
-        const.use_fixed_location = True
-        const.target = path
+    if const is not None:
+        obj.constraints.remove(const)
 
-        try:
-            const.driver_remove('offset_factor')
-        except:
-            pass
+    const = obj.constraints.new('FOLLOW_PATH')
+    const.name = 'Motion Camera'
 
-        d = const.driver_add('offset_factor')
-        d.driver.type = 'AVERAGE'
+    const.use_fixed_location = True
+    const.target = path
 
-        var1 = d.driver.variables.new()
-        var1.targets[0].id = obj
-        var1.targets[0].data_path = 'motion_cam.offset_factor'
+    try:
+        const.driver_remove('offset_factor')
+    except:
+        pass
 
-        # update for driver
-        path.data.update_tag()
+    d = const.driver_add('offset_factor')
+    d.driver.type = 'AVERAGE'
 
-        # hide
-        coll = bpy.context.collection
-        # coll.objects.unlink(path)
-        # coll.objects.unlink(path_attr)
-        # coll.objects.unlink(path_mesh)
+    var1 = d.driver.variables.new()
+    var1.targets[0].id = obj
+    var1.targets[0].data_path = 'motion_cam.offset_factor'
+
+    # update for driver
+    path.data.update_tag()
+    return const
+
+
+def gen_cam_path(self, context):
+    """生成相机路径曲线
+    已有曲线时只更新变化的点与hook, 相机与路径类型都未变化时跳过
+
+    :param self:`
+    :param contexnt: m
+    :return:
+    """
+
+    @meas_time
+    def process():
+        obj = self.id_data
+        m_cam = obj.motion_cam
+        cam_list = get_motion_cameras(obj)
+
+        if len(cam_list) < 2:
+            # 剩余相机不足以生成路径, 也要丢弃按旧列表缓存的路径/插值核
+            invalidate_motion_path(obj)
+            return
+
+        path_type = m_cam.path_type
+        cam_names = [cam.name for cam in cam_list]
+
+        path = m_cam.path
+        if path is not None and path.type != 'CURVE':
+            path = None
+        old_names = list(path.get('motion_cam_cameras', ())) if path else None
+        old_type = path.get('motion_cam_path_type') if path else None
+
+        use_nodes = m_cam.sample_mode == 'NODES'
+        sample_ok = ((m_cam.path_attr is not None and m_cam.path_mesh is not None) if use_nodes else
+                     (m_cam.path_attr is None and m_cam.path_mesh is None))
+
+        if (path is not None and
+                old_names == cam_names and
+                old_type == path_type and
+                sample_ok and
+                'Motion Camera' in obj.constraints):
+            return
+
+        invalidate_motion_path(obj)
+        cam_pts = [cam.matrix_world.translation for cam in cam_list]
+
+        if path is None:
+            path = gen_bezier_curve_from_points(coords=cam_pts,
+                                                type=path_type,
+                                                curve_name=obj.name + '-MotionPath',
+                                                resolution_u=12)
+            gen_path_hooks(path, cam_list, path_type)
+        elif (old_type == path_type and len(old_names) == len(cam_names) and
+              len(path.get('motion_cam_hooks', ())) == len(cam_names)):
+            changed = [i for i, name in enumerate(cam_names) if old_names[i] != name]
+            update_curve_points(path, cam_pts, changed, path_type)
+            gen_path_hooks(path, cam_list, path_type, changed)
+        else:
+            fill_curve_data(path.data, cam_pts, type=path_type)
+            gen_path_hooks(path, cam_list, path_type)
+
+        path['motion_cam_cameras'] = cam_names
+        path['motion_cam_path_type'] = path_type
+        m_cam.path = path
+
+        # 生成用于采样/绘制的网格数据, 采样物体的输入为曲线物体, 复用曲线时无需重建
+        # NUMPY模式下由MotionPath采样, 不创建(并移除已有的)几何节点物体
+        if use_nodes:
+            if m_cam.path_attr is None:
+                m_cam.path_attr = gen_sample_attr_obj(path)
+            if m_cam.path_mesh is None:
+                m_cam.path_mesh = gen_sample_mesh_obj(path)
+        else:
+            remove_sample_obj(m_cam.path_attr)
+            remove_sample_obj(m_cam.path_mesh)
+            m_cam.path_attr = None
+            m_cam.path_mesh = None
+
+        # 约束
+        ensure_path_constraint(obj, path)
 
     global G_STATE_UPDATE
 
@@ -243,6 +374,32 @@ def gen_cam_path(self, context):
     G_STATE_UPDATE = False
 
 
+def rebuild_path(obj):
+    gen_cam_path(obj.motion_cam, bpy.context)
+
+
+def mark_path_dirty(obj):
+    """记录改变路径几何的列表修改并重建路径, 见path_edit.mark_path_dirty"""
+    path_edit.mark_path_dirty(obj, rebuild_path)
+
+
+def batch_path_edit(obj):
+    """批量修改相机列表, 结束时最多重建一次路径"""
+    return path_edit.batch_path_edit(obj, rebuild_path)
+
+
+def update_path_camera(self, context):
+    mark_path_dirty(self.id_data)
+
+
+def update_path_type(self, context):
+    mark_path_dirty(self.id_data)
+
+
+def update_sample_mode(self, context):
+    mark_path_dirty(self.id_data)
+
+
 # 偏移factor的get/set-------------------------------------------------------------------
 
 def get_offset_factor(self):
@@ -254,59 +411,232 @@ def _update_cam(self, context):
     update_cam(self.id_data, self.id_data.motion_cam.offset_factor)
 
 
-def update_cam(obj, val):
-    if 'Motion Camera' not in obj.constraints:
-        return
-    if obj.motion_cam.affect.enable is False:
-        return
+def get_motion_cameras(obj):
+    """有效的来源相机, 与路径控制点一一对应"""
+    return [item.camera for item in obj.motion_cam.list if item.camera is not None]
 
-    # 防止移动帧时的无限触发更新
-    if hasattr(bpy.context, 'active_operator'):
-        if bpy.context.active_operator == getattr(getattr(bpy.ops, 'transform'), 'transform'): return
 
-    path = obj.motion_cam.path
-    path_attr = obj.motion_cam.path_attr
-    path_mesh = obj.motion_cam.path_mesh
+def is_animated(id_data) -> bool:
+    anim_data = id_data.animation_data
+    return anim_data is not None and (anim_data.action is not None or len(anim_data.drivers) > 0)
 
-    if path is None or path_attr is None or path_mesh is None:
-        return
 
-    attr_values_dict = get_mesh_obj_attrs(bpy.context, path_attr)
-    attr_fac = attr_values_dict.get(C_ATTR_FAC)
-    attr_length = attr_values_dict.get(C_ATTR_LENGTH)
+def bump_motion_version(obj_ptr: int):
+    G_MOTION_VERSION[obj_ptr] = G_MOTION_VERSION.get(obj_ptr, 0) + 1
 
-    if not attr_fac or not attr_length: return
 
-    for i, item in enumerate(obj.motion_cam.list):
-        item_next = obj.motion_cam.list[i + 1] if i < len(obj.motion_cam.list) - 1 else None
-        item_pre = obj.motion_cam.list[i - 1] if i > 0 else None
+def register_motion_sources(obj, cam_list):
+    """记录路径依赖的数据, depsgraph更新到这些数据时使缓存失效"""
+    ptr = obj.as_pointer()
+    unregister_motion_sources(ptr)
 
-        fac = attr_fac[i]
+    ids = set()
+    animated = False
+    for cam in cam_list:
+        ob = cam
+        while ob is not None:  # 父级的变换也会移动相机
+            ids.add(ob.as_pointer())
+            animated |= is_animated(ob) or len(ob.constraints) > 0
+            ob = ob.parent
+        ids.add(cam.data.as_pointer())
+        animated |= is_animated(cam.data)
+        if focus := cam.data.dof.focus_object:
+            ids.add(focus.as_pointer())
+            animated |= is_animated(focus) or focus.parent is not None
 
-        if item_next:  # 有下一点时，用本点和下一点比较，若value存在当前区间，则在当前相机重进行转换
-            from_obj = item.camera
-            to_obj = item_next.camera
-            next_fac = attr_fac[i + 1]
+    for id_ptr in ids:
+        G_MOTION_SOURCES.setdefault(id_ptr, set()).add(ptr)
+    G_MOTION_SOURCE_IDS[ptr] = ids
+    if animated:
+        G_MOTION_ANIMATED.add(ptr)
 
-            if fac <= val < next_fac:
-                true_fac = (val - fac) / (next_fac - fac)
 
-                interpolate_cam(obj, from_obj, to_obj, true_fac)
-                break
-        else:  # 不存在下一点时，与上一点进行比较
-            if item_pre is None: continue
+def unregister_motion_sources(obj_ptr: int):
+    for id_ptr in G_MOTION_SOURCE_IDS.pop(obj_ptr, ()):
+        rigs = G_MOTION_SOURCES.get(id_ptr)
+        if rigs is not None:
+            rigs.discard(obj_ptr)
+            if not rigs:
+                del G_MOTION_SOURCES[id_ptr]
+    G_MOTION_ANIMATED.discard(obj_ptr)
 
-            from_obj = item_pre.camera
-            to_obj = item.camera
-            pre_fac = attr_fac[i - 1]
 
-            if pre_fac <= val < fac:
-                true_fac = (val - pre_fac) / (fac - pre_fac)
-            else:
-                true_fac = 1
+def tag_motion_sources(depsgraph):
+    """根据depsgraph.updates增加受影响运动相机的版本, 物体只在变换变化时标记"""
+    for update in depsgraph.updates:
+        id_data = update.id.original
+        rigs = G_MOTION_SOURCES.get(id_data.as_pointer())
+        if not rigs:
+            continue
+        if isinstance(id_data, bpy.types.Object) and not update.is_updated_transform:
+            continue
+        for obj_ptr in rigs:
+            bump_motion_version(obj_ptr)
+
+
+def clear_motion_caches():
+    """打开文件/撤销后指针可能失效, 清空全部缓存"""
+    for cache in (G_PATH_CACHE, G_KERNEL_CACHE, G_EVAL_CACHE, G_MOTION_VERSION,
+                  G_MOTION_SOURCES, G_MOTION_SOURCE_IDS, G_MOTION_ANIMATED, G_PATH_BATCHES):
+        cache.clear()
+
+
+def invalidate_motion_path(obj):
+    bump_motion_version(obj.as_pointer())
+    G_PATH_CACHE.pop(obj.as_pointer(), None)
+    G_KERNEL_CACHE.pop(obj.as_pointer(), None)
+    G_EVAL_CACHE.pop(obj.as_pointer(), None)
 
-            interpolate_cam(obj, from_obj, to_obj, true_fac)
-            break
+
+def get_motion_path(obj, cam_list=None):
+    """根据来源相机位置构建路径, 不经过depsgraph
+    版本未变化时直接返回缓存的路径(包含各段的factor与长度), 不读取任何相机
+
+    :param obj: bpy.types.Object
+    :param cam_list: 已读取的来源相机列表, 避免重复访问集合
+    :return: MotionPath / None
+    """
+    ptr = obj.as_pointer()
+    version = G_MOTION_VERSION.get(ptr, 0)
+    cache = G_PATH_CACHE.get(ptr)
+    if cache is not None and cache[0] == version:
+        return cache[1]
+
+    if cam_list is None:
+        cam_list = get_motion_cameras(obj)
+    if len(cam_list) < 2: return
+
+    cam_pts = [cam.matrix_world.translation for cam in cam_list]
+    motion_path = MotionPath(cam_pts, path_type=obj.motion_cam.path_type, resolution=12)
+    G_PATH_CACHE[ptr] = (version, motion_path)
+    G_EVAL_CACHE.pop(ptr, None)
+    register_motion_sources(obj, cam_list)
+    return motion_path
+
+
+def get_motion_kernel(obj, cam_list=None) -> "CamKernel | None":
+    """来源相机的插值核, 版本未变化(相机变换与相机数值都未变化)时返回缓存
+
+    :param obj: bpy.types.Object
+    :param cam_list: get_motion_cameras的结果, 命中缓存时不读取
+    :return: CamKernel / None
+    """
+    ptr = obj.as_pointer()
+    version = G_MOTION_VERSION.get(ptr, 0)
+    cache = G_KERNEL_CACHE.get(ptr)
+    if cache is not None and cache[0] == version:
+        return cache[1]
+
+    if cam_list is None:
+        cam_list = get_motion_cameras(obj)
+    if len(cam_list) < 2: return
+
+    kernel = CamKernel.from_snapshot(snapshot_motion_cameras(cam_list))
+    G_KERNEL_CACHE[ptr] = (version, kernel)
+    G_EVAL_CACHE.pop(ptr, None)
+    return kernel
+
+
+def evaluate_motion_cam(obj, factor: float, cam_list=None) -> "CamState | None":
+    """求值运动相机在factor处的旋转与相机数值
+    结果按物体缓存(LRU), 版本变化(路径/来源相机变化)时作废, 同一factor的重复查询(重绘/烘焙/控件)直接返回
+    命中时只比较版本, 不读取来源相机
+
+    :param obj: 运动相机物体
+    :param factor: offset_factor
+    :param cam_list: 已读取的来源相机列表
+    :return: CamState / None
+    """
+    ptr = obj.as_pointer()
+    version = G_MOTION_VERSION.get(ptr, 0)
+    key = round(factor, C_EVAL_FACTOR_DIGITS)
+    cache = G_EVAL_CACHE.get(ptr)
+    if cache is not None and cache[0] == version:
+        state = cache[1].get(key)
+        if state is not None:
+            G_EVAL_STATS['hits'] += 1
+            cache[1].move_to_end(key)
+            return state
+
+    if cam_list is None:
+        cam_list = get_motion_cameras(obj)
+    motion_path = get_motion_path(obj, cam_list)
+    if motion_path is None: return
+    kernel = get_motion_kernel(obj, cam_list)
+
+    # 重建路径/插值核时已清空旧版本的结果
+    cache = G_EVAL_CACHE.get(ptr)
+    if cache is None or cache[0] != version:
+        cache = G_EVAL_CACHE[ptr] = (version, OrderedDict())
+    cache = cache[1]
+
+    G_EVAL_STATS['misses'] += 1
+    i, true_fac = motion_path.locate(factor)
+    state = cache[key] = kernel.evaluate(i, true_fac)
+    if len(cache) > C_EVAL_CACHE_SIZE:
+        cache.popitem(last=False)
+    return state
+
+
+def get_motion_path_coords(obj, resolution: int = 12) -> "np.ndarray | None":
+    """沿路径均匀采样的位置, 代替 path_mesh 的几何节点求值用于绘制
+
+    :param obj: bpy.types.Object
+    :param resolution: 每段的采样数, 与曲线的resolution_u一致
+    :return: (n, 3) / None
+    """
+    motion_path = get_motion_path(obj)
+    if motion_path is None: return
+
+    count = max(len(motion_path.segments) * resolution, 1) + 1
+    return motion_path.position_array(np.linspace(0, 1, count))
+
+
+def draw_motion_paths():
+    """NUMPY模式没有几何节点显示物体, 在视口中直接绘制路径, 版本未变化时复用batch"""
+    context = bpy.context
+    shader = gpu.shader.from_builtin('POLYLINE_UNIFORM_COLOR')
+    batches = []
+    for obj in context.visible_objects:
+        m_cam = obj.motion_cam
+        if m_cam.sample_mode != 'NUMPY' or len(m_cam.list) < 2: continue
+
+        ptr = obj.as_pointer()
+        version = G_MOTION_VERSION.get(ptr, 0)
+        cache = G_PATH_BATCHES.get(ptr)
+        if cache is None or cache[0] != version:
+            coords = get_motion_path_coords(obj)
+            if coords is None: continue
+            batch = batch_for_shader(shader, 'LINE_STRIP', {"pos": coords.astype(np.float32)})
+            cache = G_PATH_BATCHES[ptr] = (version, batch)
+        batches.append(cache[1])
+
+    if not batches: return
+
+    pref = get_pref().draw_motion_curve
+    gpu.state.blend_set('ALPHA')
+    shader.uniform_float('viewportSize', (context.region.width, context.region.height))
+    shader.uniform_float('lineWidth', pref.width)
+    shader.uniform_float('color', pref.color)
+    for batch in batches:
+        batch.draw(shader)
+    gpu.state.blend_set('NONE')
+
+
+def update_cam(obj, val):
+    if 'Motion Camera' not in obj.constraints:
+        return
+    if obj.motion_cam.affect.enable is False:
+        return
+
+    # 防止移动帧时的无限触发更新
+    if hasattr(bpy.context, 'active_operator'):
+        if bpy.context.active_operator == getattr(getattr(bpy.ops, 'transform'), 'transform'): return
+
+    # 几何节点物体仅用于显示, 采样由MotionPath完成, 结果缓存在G_EVAL_CACHE中供烘焙读取
+    state = evaluate_motion_cam(obj, val)
+    if state is None: return
+    apply_cam_state(obj, state)
 
 
 def set_offset_factor(self, value):
@@ -343,7 +673,7 @@ def update_driver(self, context):
 class MotionCamItemProps(PropertyGroup):
     camera: PointerProperty(name='Camera', type=bpy.types.Object,
                             poll=lambda self, obj: obj.type == 'CAMERA' and obj != self,
-                            update=gen_cam_path)
+                            update=update_path_camera)
 
 
 class MotionCamAffectCustomProp(PropertyGroup):
@@ -370,7 +700,7 @@ class MotionCamListProp(PropertyGroup):
     ui: EnumProperty(items=[('CONTROL', 'Set', ''), ('AFFECT', 'Affect', '')], options={'HIDDEN'})
     # 相机列表
     list: CollectionProperty(name='List', type=MotionCamItemProps)
-    list_index: IntProperty(name='List', min=0, default=0, update=gen_cam_path)
+    list_index: IntProperty(name='List', min=0, default=0)  # 仅用于列表选择, 不影响路径
 
     # 路径
     path: PointerProperty(type=bpy.types.Object)
@@ -379,7 +709,16 @@ class MotionCamListProp(PropertyGroup):
     path_type: EnumProperty(name='Type', items=[('LINEAR', 'Linear', ''), ('SMOOTH', 'Smooth', '')],
                             default='SMOOTH',
                             options={'HIDDEN'},
-                            update=gen_cam_path)
+                            update=update_path_type)
+    # 采样方式: NUMPY 由控制点直接计算, 不创建几何节点采样物体, 路径由视口绘制代替显示
+    # 默认保留几何节点物体, 已有的运动相机不会被移除显示物体
+    sample_mode: EnumProperty(name='Sample',
+                              items=[('NUMPY', 'NumPy', 'Sample the path in Python from the spline control points '
+                                                        'and draw it in the viewport'),
+                                     ('NODES', 'Geometry Nodes', 'Sample the path with Geometry Nodes helper objects')],
+                              default='NODES',
+                              options={'HIDDEN'},
+                              update=update_sample_mode)
 
     # 偏移 用于混合相机其他参数
     offset_factor: FloatProperty(name='Offset Factor', min=0, max=1,
@@ -437,6 +776,46 @@ class CAMHP_UL_CameraList(UIList):
         layout.prop(item, 'camera', text='', emboss=True)
 
 
+def insert_after_active(m_cam, count: int = 1):
+    """将列表末尾新增的项一次性移动到当前选中项之后, 并选中最后一个新增项"""
+    old_index = m_cam.list_index
+    start = len(m_cam.list) - count
+    target = min(old_index + 1, start)
+
+    for i in range(count):
+        m_cam.list.move(start + i, target + i)
+    m_cam.list_index = target + count - 1
+
+
+def sort_cameras(context, cameras: list, order: str = 'TWO_OPT', start_camera=None) -> list:
+    """排序要添加的相机
+
+    :param order: 'TWO_OPT' / 'NEAREST' / 'NAME' / 'MARKER'
+    :param start_camera: 列表中已有的相机, 路径从离它最近的相机开始
+    """
+    cameras = sorted(cameras, key=lambda ob: ob.name)
+    if order == 'NAME' or len(cameras) < 2:
+        return cameras
+    elif order == 'MARKER':
+        # 没有标记的相机排在最后
+        frames = {}
+        for marker in context.scene.timeline_markers:
+            if marker.camera is not None:  # 同一相机有多个标记时取最早的一个
+                name = marker.camera.name
+                frames[name] = min(frames.get(name, marker.frame), marker.frame)
+        return sorted(cameras, key=lambda ob: (ob.name not in frames, frames.get(ob.name, 0)))
+
+    points = np.array([cam.matrix_world.translation for cam in cameras])
+    start = None
+    if start_camera is not None:
+        start = int(np.argmin(np.linalg.norm(points - np.array(start_camera.matrix_world.translation), axis=1)))
+
+    indices = nearest_neighbour_order(points, start)
+    if order == 'TWO_OPT':
+        indices = two_opt_order(points, indices)
+    return [cameras[i] for i in indices]
+
+
 class ListAction:
     """Add / Remove / Copy current config"""
     bl_options = {'INTERNAL', 'UNDO'}
@@ -445,39 +824,53 @@ class ListAction:
     action = None
 
     def execute(self, context):
-        m_cam = context.object.motion_cam
+        obj = context.object
+        m_cam = obj.motion_cam
+
+        with batch_path_edit(obj):
+            if self.action == 'ADD':
+                new_item = m_cam.list.add()
+                new_item.name = f'Motion{len(m_cam.list)}'
+                new_item.influence = 0.5
+                # correct index
+                insert_after_active(m_cam)
+
+                mark_path_dirty(obj)
 
-        if self.action == 'ADD':
-            new_item = m_cam.list.add()
-            new_item.name = f'Motion{len(m_cam.list)}'
-            new_item.influence = 0.5
-            # correct index
-            old_index = m_cam.list_index
-            new_index = len(m_cam.list) - 1
-            m_cam.list_index = new_index
+            elif self.action == 'ADD_SELECTED':
+                existing = set(get_motion_cameras(obj))
+                cameras = [ob for ob in context.selected_objects
+                           if ob.type == 'CAMERA' and ob != obj and ob not in existing]
+                active_item = get_active_motion_item(obj)
+                cameras = sort_cameras(context, cameras, self.order,
+                                       active_item.camera if active_item else None)
+                for cam in cameras:
+                    new_item = m_cam.list.add()
+                    new_item.name = f'Motion{len(m_cam.list)}'
+                    new_item.camera = cam
+                if cameras:
+                    insert_after_active(m_cam, len(cameras))
 
-            for i in range(old_index, new_index - 1):
-                bpy.ops.camhp.motion_list_up()
+                mark_path_dirty(obj)
 
-        elif self.action == 'REMOVE':
-            m_cam.list.remove(self.index)
-            m_cam.list_index = self.index - 1 if self.index != 0 else 0
+            elif self.action == 'REMOVE':
+                m_cam.list.remove(self.index)
+                m_cam.list_index = self.index - 1 if self.index != 0 else 0
 
-        elif self.action == 'COPY':
-            src_item = m_cam.list[self.index]
+                mark_path_dirty(obj)
 
-            new_item = m_cam.list.add()
+            elif self.action == 'COPY':
+                src_item = m_cam.list[self.index]
 
-            for key in src_item.__annotations__.keys():
-                value = getattr(src_item, key)
-                setattr(new_item, key, value)
+                new_item = m_cam.list.add()
 
-            old_index = m_cam.list_index
-            new_index = len(m_cam.list) - 1
-            m_cam.list_index = len(m_cam.list) - 1
+                for key in src_item.__annotations__.keys():
+                    value = getattr(src_item, key)
+                    setattr(new_item, key, value)
 
-            for i in range(old_index, new_index - 1):
-                bpy.ops.camhp.motion_list_up()
+                insert_after_active(m_cam)
+
+                mark_path_dirty(obj)
 
         return {'FINISHED'}
 
@@ -494,8 +887,11 @@ class ListMove:
         my_list = m_cam.list
         index = m_cam.list_index
         neighbor = index + (-1 if self.action == 'UP' else 1)
-        my_list.move(neighbor, index)
-        self.move_index(context)
+        with batch_path_edit(context.object):
+            my_list.move(neighbor, index)
+            self.move_index(context)
+
+            mark_path_dirty(context.object)
 
         return {'FINISHED'}
 
@@ -514,6 +910,27 @@ class CAMHP_OT_motion_list_add(ListAction, Operator):
     action = 'ADD'
 
 
+class CAMHP_OT_motion_list_add_selected(ListAction, Operator):
+    """Add all selected cameras to the list, the path is rebuilt once"""
+    bl_idname = 'camhp.motion_list_add_selected'
+    bl_label = 'Add Selected Cameras'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # 不使用index, 不在重做面板中显示
+    index: IntProperty(options={'HIDDEN', 'SKIP_SAVE'})
+    # 选中相机的排序方式
+    order: EnumProperty(name='Order',
+                        items=[
+                            ('TWO_OPT', 'Shortest Path', 'Nearest neighbour path improved with 2-opt'),
+                            ('NEAREST', 'Nearest Neighbour', 'Always go to the closest remaining camera'),
+                            ('NAME', 'Name', 'Sort by camera name'),
+                            ('MARKER', 'Marker', 'Sort by the frame of the timeline marker bound to each camera'),
+                        ],
+                        default='TWO_OPT')
+
+    action = 'ADD_SELECTED'
+
+
 class CAMHP_OT_motion_list_remove(ListAction, Operator):
     """"""
     bl_idname = 'camhp.motion_list_remove'
@@ -549,10 +966,10 @@ class CAMHP_OT_move_down_motion_cam(ListMove, Operator):
 # Operator for the list of cameras -------------------------------------------
 ###############################################################################
 
-from ops.old.draw_utils.bl_ui_draw_op import BL_UI_OT_draw_operator
-from ops.old.draw_utils.bl_ui_button import BL_UI_Button
-from ops.old.draw_utils.bl_ui_drag_panel import BL_UI_Drag_Panel
-from ops.old.draw_utils.bl_ui_label import BL_UI_Label
+from ..old.draw_utils.bl_ui_draw_op import BL_UI_OT_draw_operator
+from ..old.draw_utils.bl_ui_button import BL_UI_Button
+from ..old.draw_utils.bl_ui_drag_panel import BL_UI_Drag_Panel
+from ..old.draw_utils.bl_ui_label import BL_UI_Label
 from ...utils.asset import AssetDir, get_asset_dir
 
 from bpy_extras.view3d_utils import location_3d_to_region_2d
@@ -624,6 +1041,7 @@ class CAMHP_PT_MotionCamPanel(Panel):
         layout.label(text=context.object.name, icon=context.object.type + '_DATA')
 
         layout.prop(context.object.motion_cam, 'path_type')
+        layout.prop(context.object.motion_cam, 'sample_mode')
         layout.prop(context.object.motion_cam, 'offset_factor', slider=True)
 
         # 视口k帧
@@ -644,6 +1062,7 @@ class CAMHP_PT_MotionCamPanel(Panel):
         col_btn = row.column(align=1)
 
         col_btn.operator('camhp.motion_list_add', text='', icon='ADD')
+        col_btn.operator('camhp.motion_list_add_selected', text='', icon='RESTRICT_SELECT_OFF')
 
         d = col_btn.operator('camhp.motion_list_remove', text='', icon='REMOVE')
         d.index = context.object.motion_cam.list_index
@@ -659,6 +1078,7 @@ class CAMHP_PT_MotionCamPanel(Panel):
         c.index = context.object.motion_cam.list_index
 
         layout.operator('camhp.bake_motion_cam')
+        layout.operator('camhp.bake_all_motion_cams')
 
     def draw_setttings(self, context, layout):
 
@@ -743,6 +1163,31 @@ def draw_add_context(self, context):
 
 ###############################################################################
 
+@persistent
+def motion_depsgraph_update_post(scene, depsgraph):
+    tag_motion_sources(depsgraph)
+
+
+@persistent
+def motion_frame_change_pre(scene, *args):
+    for obj_ptr in G_MOTION_ANIMATED:
+        bump_motion_version(obj_ptr)
+
+
+@persistent
+def motion_clear_caches(*args):
+    clear_motion_caches()
+
+
+C_MOTION_HANDLERS = (
+    ('depsgraph_update_post', motion_depsgraph_update_post),
+    ('frame_change_pre', motion_frame_change_pre),
+    ('load_post', motion_clear_caches),
+    ('undo_post', motion_clear_caches),
+    ('redo_post', motion_clear_caches),
+)
+
+
 def register():
     bpy.utils.register_class(MotionCamItemProps)
     bpy.utils.register_class(MotionCamAffectCustomProp)
@@ -754,6 +1199,7 @@ def register():
     bpy.utils.register_class(CAMHP_OT_affect_remove_custom_prop)
 
     bpy.utils.register_class(CAMHP_OT_motion_list_add)
+    bpy.utils.register_class(CAMHP_OT_motion_list_add_selected)
     bpy.utils.register_class(CAMHP_OT_motion_list_remove)
     bpy.utils.register_class(CAMHP_OT_copy_motion_cam)
     bpy.utils.register_class(CAMHP_OT_move_up_motion_cam)
@@ -764,11 +1210,18 @@ def register():
     # bpy.utils.register_class(CAMHP_PT_MotionCamPanel)
 
     bpy.utils.register_class(CAMHP_PT_add_motion_cams)
-    bpy.utils.register_class(CAMHP_OT_bake_motion_cam)
+    # bake 导入了本模块, 在注册时再导入避免循环导入
+    from . import bake
+    bake.register()
 
     # bpy.types.VIEW3D_MT_object_context_menu.append(draw_context)
     # bpy.types.VIEW3D_MT_object_context_menu.append(draw_add_context)
 
+    for name, handler in C_MOTION_HANDLERS:
+        getattr(bpy.app.handlers, name).append(handler)
+    G_PATH_DRAW_HANDLE['handle'] = bpy.types.SpaceView3D.draw_handler_add(draw_motion_paths, (), 'WINDOW',
+                                                                          'POST_VIEW')
+
 
 def unregister():
     del bpy.types.Object.motion_cam
@@ -781,6 +1234,7 @@ def unregister():
     bpy.utils.unregister_class(CAMHP_OT_affect_remove_custom_prop)
 
     bpy.utils.unregister_class(CAMHP_OT_motion_list_add)
+    bpy.utils.unregister_class(CAMHP_OT_motion_list_add_selected)
     bpy.utils.unregister_class(CAMHP_OT_motion_list_remove)
     bpy.utils.unregister_class(CAMHP_OT_copy_motion_cam)
     bpy.utils.unregister_class(CAMHP_OT_move_up_motion_cam)
@@ -791,6 +1245,16 @@ def unregister():
     # bpy.utils.unregister_class(CAMHP_PT_MotionCamPanel)
 
     bpy.utils.unregister_class(CAMHP_PT_add_motion_cams)
-    bpy.utils.unregister_class(CAMHP_OT_bake_motion_cam)
+    from . import bake
+    bake.unregister()
     # bpy.types.VIEW3D_MT_object_context_menu.remove(draw_context)
     # bpy.types.VIEW3D_MT_object_context_menu.remove(draw_add_context)
+
+    for name, handler in C_MOTION_HANDLERS:
+        handlers = getattr(bpy.app.handlers, name)
+        if handler in handlers:
+            handlers.remove(handler)
+    if G_PATH_DRAW_HANDLE['handle'] is not None:
+        bpy.types.SpaceView3D.draw_handler_remove(G_PATH_DRAW_HANDLE['handle'], 'WINDOW')
+        G_PATH_DRAW_HANDLE['handle'] = None
+    clear_motion_caches()
@@ -0,0 +1,69 @@
+"""Ordering of source cameras for a motion path
+
+Works on plain (n, 3) position arrays, returns index arrays.
+"""
+import numpy as np
+
+
+def nearest_neighbour_order(points: np.ndarray, start: "int | None" = None) -> np.ndarray:
+    """最近邻排序
+
+    :param points: (n, 3)
+    :param start: 起点索引, 默认为离中心最远的点(开放路径的端点)
+    :return: (n,) 索引
+    """
+    points = np.asarray(points, dtype=np.float64)
+    count = len(points)
+    if count < 2:
+        return np.arange(count)
+
+    if start is None:
+        start = int(np.argmax(np.linalg.norm(points - points.mean(axis=0), axis=1)))
+
+    dist = np.linalg.norm(points[:, None, :] - points[None, :, :], axis=2)
+    visited = np.zeros(count, dtype=bool)
+    order = np.empty(count, dtype=np.int64)
+    order[0] = start
+    visited[start] = True
+
+    for i in range(1, count):
+        d = np.where(visited, np.inf, dist[order[i - 1]])
+        order[i] = int(np.argmin(d))
+        visited[order[i]] = True
+    return order
+
+
+def two_opt_order(points: np.ndarray, order: np.ndarray, max_passes: int = 50) -> np.ndarray:
+    """对开放路径做2-opt优化, 起点保持不变
+
+    :param points: (n, 3)
+    :param order: 初始顺序
+    :return: 优化后的顺序
+    """
+    order = np.array(order, dtype=np.int64)
+    pts = np.asarray(points, dtype=np.float64)[order]
+    count = len(order)
+
+    for _ in range(max_passes):
+        improved = False
+        for i in range(count - 2):
+            # 反转 [i + 1, j], j = i + 2 .. n - 1
+            a = pts[i]
+            b = pts[i + 1]
+            c = pts[i + 2:]
+            old = np.linalg.norm(a - b) + np.zeros(len(c))
+            new = np.linalg.norm(c - a, axis=1)
+            if len(c) > 1:
+                nxt = pts[i + 3:]
+                old[:-1] += np.linalg.norm(nxt - c[:-1], axis=1)
+                new[:-1] += np.linalg.norm(nxt - b, axis=1)
+
+            k = int(np.argmin(new - old))
+            if new[k] - old[k] < -1e-9:
+                j = i + 2 + k
+                pts[i + 1:j + 1] = pts[i + 1:j + 1][::-1]
+                order[i + 1:j + 1] = order[i + 1:j + 1][::-1]
+                improved = True
+        if not improved:
+            break
+    return order
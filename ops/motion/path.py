@@ -0,0 +1,274 @@
+"""In-process motion camera path
+
+Rebuilds the curve that `gen_bezier_curve_from_points` creates from the source camera positions and
+answers factor -> (position, segment, local t) queries without any depsgraph evaluation.
+The Geometry Nodes sample objects are only needed for display.
+"""
+from bisect import bisect_right
+
+import numpy as np
+
+# blender 自动手柄的长度系数 (calchandleNurb_intern)
+C_AUTO_HANDLE_FAC = 2.5614
+# 自动手柄两侧长度的最大比例 (calchandleNurb_intern)
+C_AUTO_HANDLE_RATIO = 5.0
+# 5点高斯-勒让德积分
+C_GL_NODES, C_GL_WEIGHTS = np.polynomial.legendre.leggauss(5)
+# 弧长反查的收敛误差, 相对于路径总长
+C_DISTANCE_TOL = 1e-12
+
+
+def auto_handles(points: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """计算与blender AUTO手柄一致的左右手柄, 首尾手柄与控制点重合(与曲线生成保持一致)
+
+    :param points: (n, 3) 控制点
+    :return: (handle_left, handle_right)
+    """
+    handle_left = points.copy()
+    handle_right = points.copy()
+    if len(points) < 3:
+        return handle_left, handle_right
+
+    dvec_a = points[1:-1] - points[:-2]
+    dvec_b = points[2:] - points[1:-1]
+    len_a = np.linalg.norm(dvec_a, axis=1)
+    len_b = np.linalg.norm(dvec_b, axis=1)
+    len_a[len_a == 0] = 1
+    len_b[len_b == 0] = 1
+
+    tvec = dvec_b / len_b[:, None] + dvec_a / len_a[:, None]
+    length = np.linalg.norm(tvec, axis=1) * C_AUTO_HANDLE_FAC
+    valid = length != 0
+    length[~valid] = 1
+
+    # 方向使用原长度计算, 手柄长度再互相限制在5倍以内(先限制a, 再用限制后的a限制b)
+    len_a = np.minimum(len_a, C_AUTO_HANDLE_RATIO * len_b)
+    len_b = np.minimum(len_b, C_AUTO_HANDLE_RATIO * len_a)
+
+    handle_left[1:-1] -= np.where(valid[:, None], tvec * (len_a / length)[:, None], 0)
+    handle_right[1:-1] += np.where(valid[:, None], tvec * (len_b / length)[:, None], 0)
+    return handle_left, handle_right
+
+
+def bezier_point(ctrl: np.ndarray, t: np.ndarray) -> np.ndarray:
+    """三次贝塞尔求值
+
+    :param ctrl: (4, 3) 控制点, 或 (m, 4, 3) 每个参数各自的控制点
+    :param t: (m,) 参数
+    :return: (m, 3)
+    """
+    t = np.asarray(t, dtype=np.float64)[:, None]
+    mt = 1 - t
+    p0, p1, p2, p3 = np.moveaxis(ctrl, -2, 0)
+    return (mt ** 3 * p0 +
+            3 * mt ** 2 * t * p1 +
+            3 * mt * t ** 2 * p2 +
+            t ** 3 * p3)
+
+
+def bezier_derivative(ctrl: np.ndarray, t: np.ndarray) -> np.ndarray:
+    """三次贝塞尔的一阶导数, 参数同bezier_point"""
+    t = np.asarray(t, dtype=np.float64)[:, None]
+    mt = 1 - t
+    p0, p1, p2, p3 = np.moveaxis(ctrl, -2, 0)
+    return 3 * (mt ** 2 * (p1 - p0) +
+                2 * mt * t * (p2 - p1) +
+                t ** 2 * (p3 - p2))
+
+
+def gauss_legendre_length(ctrl: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """用高斯-勒让德积分求贝塞尔曲线在 [a, b] 上的弧长
+
+    :param ctrl: (4, 3) 或 (m, 4, 3)
+    :param a: (m,)
+    :param b: (m,)
+    :return: (m,)
+    """
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    half = (b - a) / 2
+    t = ((a + b) / 2)[:, None] + half[:, None] * C_GL_NODES[None, :]
+
+    if ctrl.ndim == 3:
+        ctrl = np.repeat(ctrl, len(C_GL_NODES), axis=0)
+    speed = np.linalg.norm(bezier_derivative(ctrl, t.ravel()), axis=1).reshape(t.shape)
+    return half * (speed @ C_GL_WEIGHTS)
+
+
+def arc_length_table(ctrl: np.ndarray, min_intervals: int = 12, tol: float = 1e-7,
+                     max_depth: int = 10) -> tuple[np.ndarray, np.ndarray]:
+    """自适应高斯-勒让德积分, 生成单段曲线的弧长表
+    区间的积分与两半之和的差超过误差时继续二分
+
+    :param ctrl: (4, 3)
+    :param min_intervals: 最少区间数量
+    :param tol: 相对于控制多边形长度的误差
+    :return: (t (m + 1,), 累积弧长 (m + 1,))
+    """
+    tol = tol * max(float(np.linalg.norm(np.diff(ctrl, axis=0), axis=1).sum()), 1e-12)
+
+    edges = np.linspace(0, 1, max(min_intervals, 1) + 1)
+    a, b = edges[:-1], edges[1:]
+    starts, lengths = [], []
+
+    for depth in range(max_depth + 1):
+        mid = (a + b) / 2
+        whole = gauss_legendre_length(ctrl, a, b)
+        left = gauss_legendre_length(ctrl, a, mid)
+        right = gauss_legendre_length(ctrl, mid, b)
+
+        ok = np.abs(whole - (left + right)) <= tol
+        if depth == max_depth:
+            ok[:] = True
+        starts += [a[ok], mid[ok]]
+        lengths += [left[ok], right[ok]]
+
+        a, b = np.concatenate((a[~ok], mid[~ok])), np.concatenate((mid[~ok], b[~ok]))
+        if a.size == 0:
+            break
+
+    starts = np.concatenate(starts)
+    lengths = np.concatenate(lengths)
+    order = np.argsort(starts)
+    t = np.append(starts[order], 1.0)
+    distances = np.concatenate(((0.0,), np.cumsum(lengths[order])))
+    return t, distances
+
+
+class MotionPath:
+    """Arc-length parameterised Bezier/poly path through the source cameras
+
+    factor 0..1 is the arc-length fraction of the whole path, the same value that drives the Follow Path constraint,
+    so equal factor steps travel equal distances.
+    """
+
+    def __init__(self, points, path_type: str = 'SMOOTH', resolution: int = 12):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        self.path_type = path_type
+        self.resolution = max(int(resolution), 1)
+
+        self.segments = self._build_segments()
+        self._build_table()
+
+    def __len__(self):
+        return len(self.points)
+
+    def _build_segments(self) -> np.ndarray:
+        """每段的贝塞尔控制点 (n - 1, 4, 3), 直线段用1/3处的手柄表示"""
+        p0 = self.points[:-1]
+        p3 = self.points[1:]
+        if self.path_type == 'SMOOTH':
+            handle_left, handle_right = auto_handles(self.points)
+            p1 = handle_right[:-1]
+            p2 = handle_left[1:]
+        else:
+            p1 = p0 + (p3 - p0) / 3
+            p2 = p0 + (p3 - p0) * 2 / 3
+        return np.stack((p0, p1, p2, p3), axis=1)
+
+    def _build_table(self):
+        """生成整条路径的弧长表
+        self.table (m, 2): 第一列为全局参数 u = 段索引 + 段内参数, 第二列为累积弧长
+        """
+        rows = []
+        offset = 0.0
+        lengths = np.empty(len(self.segments))
+        for i, ctrl in enumerate(self.segments):
+            if self.path_type == 'SMOOTH':
+                t, dist = arc_length_table(ctrl, min_intervals=self.resolution)
+            else:  # 直线段弧长与参数成正比
+                t = np.array((0.0, 1.0))
+                dist = np.array((0.0, np.linalg.norm(ctrl[3] - ctrl[0])))
+            lengths[i] = dist[-1]
+            start = 0 if i == 0 else 1  # 段之间共用端点
+            rows.append(np.stack((t[start:] + i, dist[start:] + offset), axis=1))
+            offset += dist[-1]
+
+        self.table = np.concatenate(rows)
+        self.lengths = lengths
+        self.length = float(offset)
+
+        # 每个相机(控制点)处的factor
+        if self.length > 0:
+            self.factors = np.concatenate(((0.0,), np.cumsum(lengths))) / self.length
+        else:
+            self.factors = np.linspace(0, 1, len(self.points))
+        # 标量查找用的列表, bisect比numpy标量调用更快
+        self.factor_list = self.factors.tolist()
+
+    def distance_to_param(self, distances: np.ndarray, iterations: int = 3) -> tuple[np.ndarray, np.ndarray]:
+        """弧长 -> (段索引, 贝塞尔参数), 查表 O(log n) 后用牛顿迭代修正"""
+        distances = np.clip(np.asarray(distances, dtype=np.float64), 0.0, self.length)
+        u_col = self.table[:, 0]
+        s_col = self.table[:, 1]
+
+        j = np.searchsorted(s_col, distances, side='right') - 1
+        j = np.clip(j, 0, len(s_col) - 2)
+
+        span = s_col[j + 1] - s_col[j]
+        valid = span > 0
+        fac = np.where(valid, (distances - s_col[j]) / np.where(valid, span, 1), 0.0)
+
+        seg = np.minimum(np.floor(u_col[j]).astype(np.int64), len(self.segments) - 1)
+        t0 = u_col[j] - seg
+        t1 = u_col[j + 1] - seg
+        t = t0 + (t1 - t0) * fac
+
+        # 带区间保护的牛顿迭代: s(t) = s_j + L(t_j, t), 速度趋近0(端点手柄与控制点重合)时退化为二分
+        ctrl = self.segments[seg]
+        # 误差在舍入范围内时直接接受: 首尾手柄与端点重合, 端点处速度为0, 继续迭代会二分到区间内部
+        tol = C_DISTANCE_TOL * max(self.length, 1.0)
+        lo, hi = t0.copy(), t1.copy()
+        for _ in range(iterations):
+            error = s_col[j] + gauss_legendre_length(ctrl, t0, t) - distances
+            done = np.abs(error) <= tol
+            lo = np.where(error < 0, t, lo)
+            hi = np.where(error > 0, t, hi)
+
+            speed = np.linalg.norm(bezier_derivative(ctrl, t), axis=1)
+            newton = t - error / np.where(speed > 0, speed, 1)
+            # 收敛后步长舍入为0时newton等于区间端点, 不能当作越界退化为二分
+            inside = (speed > 0) & (newton >= lo) & (newton <= hi)
+            t = np.where(done, t, np.where(inside, newton, (lo + hi) / 2))
+        return seg, t
+
+    def locate(self, factor: float) -> tuple[int, float]:
+        """factor -> (段索引, 段内的局部factor), 二分查找 O(log n)"""
+        factors = self.factor_list
+        i = bisect_right(factors, factor) - 1
+        i = min(max(i, 0), len(factors) - 2)
+
+        span = factors[i + 1] - factors[i]
+        if span <= 0:
+            return i, 1.0
+        return i, float(min(max((factor - factors[i]) / span, 0.0), 1.0))
+
+    def position(self, factor: float) -> np.ndarray:
+        """沿弧长的位置"""
+        return self.position_array(np.array((factor,)))[0]
+
+    def evaluate(self, factor: float) -> tuple[np.ndarray, int, float]:
+        """factor -> (位置, 段索引, 段内的局部factor)"""
+        segment, t = self.locate(factor)
+        return self.position(factor), segment, t
+
+    def locate_array(self, factors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """批量 factor -> (段索引, 段内的局部factor)"""
+        factors = np.asarray(factors, dtype=np.float64)
+        i = np.searchsorted(self.factors, factors, side='right') - 1
+        i = np.clip(i, 0, len(self.factors) - 2)
+
+        start = self.factors[i]
+        span = self.factors[i + 1] - start
+        valid = span > 0
+        t = np.where(valid, (factors - start) / np.where(valid, span, 1), 1.0)
+        return i, np.clip(t, 0.0, 1.0)
+
+    def position_array(self, factors: np.ndarray) -> np.ndarray:
+        """批量求沿弧长的位置 (m, 3), 匀速: factor的变化量与移动距离成正比"""
+        factors = np.asarray(factors, dtype=np.float64)
+        if self.length == 0:
+            return np.repeat(self.points[:1], factors.size, axis=0)
+
+        seg, t = self.distance_to_param(np.clip(factors, 0.0, 1.0) * self.length)
+        return bezier_point(self.segments[seg], t)
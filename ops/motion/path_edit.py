@@ -0,0 +1,59 @@
+"""Batched edits of the motion camera list
+
+Edits that change the path geometry only mark the rig dirty; the path is rebuilt once when the outermost
+batch ends. Works on anything with as_pointer() and takes the rebuild function as an argument, so it does
+not depend on bpy.
+"""
+from contextlib import contextmanager
+
+# 需要重建路径的物体 {obj.as_pointer()}
+G_PATH_DIRTY = set()
+# 批量修改中的物体 {obj.as_pointer(): 嵌套层数}, 期间只记录修改不重建
+G_PATH_SUSPEND = {}
+# 路径修改/重建次数, 测试用于确认批量修改只重建一次
+G_PATH_STATS = {'mutations': 0, 'rebuilds': 0}
+
+
+def mark_path_dirty(obj, rebuild):
+    """记录改变路径几何的列表修改, 不在批量修改中时立即重建
+
+    :param obj: 运动相机物体
+    :param rebuild: 重建路径的函数, 参数为obj
+    """
+    G_PATH_STATS['mutations'] += 1
+    G_PATH_DIRTY.add(obj.as_pointer())
+    if obj.as_pointer() not in G_PATH_SUSPEND:
+        flush_path_dirty(obj, rebuild)
+
+
+@contextmanager
+def batch_path_edit(obj, rebuild):
+    """批量修改相机列表, 期间暂停路径重建, 结束时最多重建一次
+
+    with batch_path_edit(obj, rebuild):
+        ...
+    """
+    key = obj.as_pointer()
+    G_PATH_SUSPEND[key] = G_PATH_SUSPEND.get(key, 0) + 1
+    try:
+        yield
+    finally:
+        G_PATH_SUSPEND[key] -= 1
+        if G_PATH_SUSPEND[key] == 0:
+            del G_PATH_SUSPEND[key]
+            flush_path_dirty(obj, rebuild)
+
+
+def flush_path_dirty(obj, rebuild) -> bool:
+    """存在未处理的修改时重建路径
+
+    :return: 是否重建
+    """
+    key = obj.as_pointer()
+    if key not in G_PATH_DIRTY:
+        return False
+    G_PATH_DIRTY.discard(key)
+
+    G_PATH_STATS['rebuilds'] += 1
+    rebuild(obj)
+    return True
@@ -0,0 +1,45 @@
+"""decimate.py 不依赖bpy, 模块目录由pytest.ini加入sys.path"""
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from decimate import decimate_keys
+
+
+def reconstruct(frames, values, keep):
+    """保留的关键帧线性插值回所有帧"""
+    values = values.reshape(len(frames), -1)
+    return np.stack([np.interp(frames, frames[keep], values[keep, i]) for i in range(values.shape[1])], axis=1)
+
+
+def test_decimate_linear():
+    """直线只保留首尾"""
+    frames = np.arange(50, dtype=np.float64)
+    keep = decimate_keys(frames, frames * 2 + 1, 1e-6)
+    assert_array_equal(np.flatnonzero(keep), (0, 49))
+
+
+def test_decimate_corner():
+    frames = np.arange(21, dtype=np.float64)
+    values = np.where(frames < 10, frames, 20 - frames)
+    assert_array_equal(np.flatnonzero(decimate_keys(frames, values, 1e-6)), (0, 10, 20))
+
+
+def test_decimate_within_tolerance():
+    """精简后线性插值的误差不超过容差, 容差越大保留越少"""
+    frames = np.linspace(0, 100, 401)
+    values = np.stack((np.sin(frames * 0.1), np.cos(frames * 0.07) * 3), axis=1)
+
+    counts = []
+    for tolerance in (0.001, 0.01, 0.1):
+        keep = decimate_keys(frames, values, tolerance)
+        assert keep[0] and keep[-1]
+        error = np.linalg.norm(reconstruct(frames, values, keep) - values, axis=1)
+        assert error.max() <= tolerance
+        counts.append(keep.sum())
+    assert counts[0] > counts[1] > counts[2]
+
+
+def test_decimate_short():
+    assert decimate_keys(np.zeros(0), np.zeros(0), 0.1).shape == (0,)
+    assert_array_equal(decimate_keys(np.array((1.0,)), np.array((5.0,)), 0.1), (True,))
+    assert_array_equal(decimate_keys(np.array((1.0, 2.0)), np.array((5.0, 0.0)), 0.1), (True, True))
@@ -0,0 +1,121 @@
+"""kernel.py 不依赖bpy, 模块目录由pytest.ini加入sys.path"""
+import math
+
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from kernel import CamKernel, quaternion_to_euler, quaternion_to_euler_array, slerp_array
+
+
+def axis_angle(axis, angle):
+    axis = np.asarray(axis, dtype=np.float64)
+    axis = axis / np.linalg.norm(axis)
+    return np.concatenate(((math.cos(angle / 2),), axis * math.sin(angle / 2)))
+
+
+def make_kernel():
+    quaternion = [axis_angle((0, 0, 1), 0), axis_angle((0, 0, 1), math.pi / 2), axis_angle((1, 1, 0), 2.0)]
+    return CamKernel(quaternion, lens=(50, 35, 85), fstop=(2.8, 4, 1.4), focal=(10, 3, 7))
+
+
+def test_slerp_array_endpoints_and_midpoint():
+    q0 = np.array([axis_angle((0, 0, 1), 0)] * 3)
+    q1 = np.array([axis_angle((0, 0, 1), math.pi / 2)] * 3)
+    quat = slerp_array(q0, q1, np.array((0, 0.5, 1)))
+    assert_allclose(quat[0], q0[0], atol=1e-12)
+    assert_allclose(quat[1], axis_angle((0, 0, 1), math.pi / 4), atol=1e-12)
+    assert_allclose(quat[2], q1[0], atol=1e-12)
+
+
+def test_slerp_array_shortest_path():
+    """q与-q为同一旋转, 插值不绕远路"""
+    q0 = np.array([axis_angle((0, 1, 0), 0.2)])
+    q1 = -np.array([axis_angle((0, 1, 0), 0.6)])
+    quat = slerp_array(q0, q1, np.array((0.5,)))
+    assert_allclose(quat[0], axis_angle((0, 1, 0), 0.4), atol=1e-12)
+
+
+@pytest.mark.parametrize('axis, angle, euler', [
+    ((0, 0, 1), math.pi / 2, (0, 0, math.pi / 2)),
+    ((1, 0, 0), 0.3, (0.3, 0, 0)),
+    ((0, 1, 0), -1.2, (0, -1.2, 0)),
+])
+def test_quaternion_to_euler_single_axis(axis, angle, euler):
+    quat = axis_angle(axis, angle)
+    assert_allclose(quaternion_to_euler(quat), euler, atol=1e-12)
+    assert_allclose(quaternion_to_euler_array(quat[None])[0], euler, atol=1e-12)
+
+
+def test_quaternion_to_euler_round_trip():
+    """欧拉角(XYZ)重新组合为旋转矩阵后与四元数的旋转一致, 标量与批量版本结果相同"""
+    rng = np.random.default_rng(1)
+    quat = rng.normal(size=(64, 4))
+    quat /= np.linalg.norm(quat, axis=1, keepdims=True)
+    euler = quaternion_to_euler_array(quat)
+    assert_allclose(euler, [quaternion_to_euler(q) for q in quat], atol=1e-12)
+
+    def rot(axis, angle):
+        c, s = math.cos(angle), math.sin(angle)
+        i, j = [(1, 2), (2, 0), (0, 1)][axis]
+        mat = np.eye(3)
+        mat[i, i] = mat[j, j] = c
+        mat[j, i], mat[i, j] = s, -s
+        return mat
+
+    for q, (x, y, z) in zip(quat, euler):
+        w, a, b, c = q
+        expected = np.array([
+            (1 - 2 * (b * b + c * c), 2 * (a * b - w * c), 2 * (a * c + w * b)),
+            (2 * (a * b + w * c), 1 - 2 * (a * a + c * c), 2 * (b * c - w * a)),
+            (2 * (a * c - w * b), 2 * (b * c + w * a), 1 - 2 * (a * a + b * b)),
+        ])
+        assert_allclose(rot(2, z) @ rot(1, y) @ rot(0, x), expected, atol=1e-9)
+
+
+def test_kernel_evaluate_endpoints():
+    kernel = make_kernel()
+    assert len(kernel) == 2
+
+    start = kernel.evaluate(0, 0.0)
+    assert_allclose(start.quaternion, axis_angle((0, 0, 1), 0), atol=1e-12)
+    assert (start.lens, start.fstop, start.focal) == pytest.approx((50, 2.8, 10))
+
+    end = kernel.evaluate(1, 1.0)
+    assert_allclose(end.quaternion, axis_angle((1, 1, 0), 2.0), atol=1e-12)
+    assert (end.lens, end.fstop, end.focal) == pytest.approx((85, 1.4, 7))
+
+    mid = kernel.evaluate(0, 0.5)
+    assert_allclose(mid.quaternion, axis_angle((0, 0, 1), math.pi / 4), atol=1e-12)
+    assert (mid.lens, mid.fstop, mid.focal) == pytest.approx((42.5, 3.4, 6.5))
+    assert_allclose(mid.euler, (0, 0, math.pi / 4), atol=1e-12)
+
+
+def test_kernel_evaluate_array_matches_scalar():
+    kernel = make_kernel()
+    segment = np.array((0, 0, 1, 1, 1))
+    fac = np.array((0, 0.25, 0, 0.7, 1))
+    state = kernel.evaluate_array(segment, fac)
+
+    for i, (seg, f) in enumerate(zip(segment, fac)):
+        scalar = kernel.evaluate(int(seg), float(f))
+        assert_allclose(state.quaternion[i], scalar.quaternion, atol=1e-12)
+        assert (state.lens[i], state.fstop[i], state.focal[i]) == pytest.approx(
+            (scalar.lens, scalar.fstop, scalar.focal))
+    assert_allclose(state.euler, [kernel.evaluate(int(s), float(f)).euler for s, f in zip(segment, fac)],
+                    atol=1e-12)
+
+
+def test_kernel_identical_rotation():
+    """相邻相机旋转相同时退化为线性插值, 不产生NaN"""
+    quat = axis_angle((0, 1, 0), 0.5)
+    kernel = CamKernel([quat, quat], lens=(50, 50), fstop=(2, 2), focal=(1, 1))
+    assert_allclose(kernel.evaluate(0, 0.3).quaternion, quat, atol=1e-12)
+    assert_allclose(kernel.evaluate_array(np.array((0,)), np.array((0.3,))).quaternion[0], quat, atol=1e-12)
+
+
+def test_kernel_from_snapshot():
+    quaternion = np.array([axis_angle((0, 0, 1), 0), axis_angle((0, 0, 1), 1)])
+    kernel = CamKernel.from_snapshot({'quaternion': quaternion, 'lens': np.array((50, 60)),
+                                      'fstop': np.array((2, 4)), 'focal': np.array((1, 3))})
+    assert kernel.evaluate(0, 0.5).lens == pytest.approx(55)
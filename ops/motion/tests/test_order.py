@@ -0,0 +1,48 @@
+"""order.py 不依赖bpy, 模块目录由pytest.ini加入sys.path"""
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from order import nearest_neighbour_order, two_opt_order
+
+
+def path_length(points, order):
+    return np.linalg.norm(np.diff(points[order], axis=0), axis=1).sum()
+
+
+def test_nearest_neighbour_line():
+    """直线上打乱的点, 默认从离中心最远的端点开始依次连接"""
+    x = np.array((3, 0, 4, 1, 2, 6))
+    points = np.stack((x, np.zeros(6), np.zeros(6)), axis=1).astype(np.float64)
+    order = nearest_neighbour_order(points)
+    assert_array_equal(x[order], (6, 4, 3, 2, 1, 0))
+
+
+def test_nearest_neighbour_start():
+    points = np.array([(0, 0, 0), (1, 0, 0), (2, 0, 0), (3, 0, 0)], dtype=np.float64)
+    assert_array_equal(nearest_neighbour_order(points, start=1), (1, 0, 2, 3))
+
+
+def test_order_small():
+    assert_array_equal(nearest_neighbour_order(np.zeros((0, 3))), ())
+    assert_array_equal(nearest_neighbour_order(np.zeros((1, 3))), (0,))
+    assert_array_equal(two_opt_order(np.zeros((2, 3)), [1, 0]), (1, 0))
+
+
+def test_two_opt_removes_backtrack():
+    """折返的路径 0-2-1-3 被反转为 0-1-2-3, 起点不变"""
+    points = np.array([(0, 0, 0), (1, 0, 1), (2, 0, 2), (3, 0, 3)], dtype=np.float64)
+    order = two_opt_order(points, [0, 2, 1, 3])
+    assert order[0] == 0
+    assert path_length(points, order) < path_length(points, [0, 2, 1, 3])
+    assert_array_equal(order, (0, 1, 2, 3))
+
+
+def test_two_opt_not_longer_than_nearest_neighbour():
+    rng = np.random.default_rng(7)
+    points = rng.uniform(-10, 10, size=(40, 3))
+    initial = nearest_neighbour_order(points)
+    order = two_opt_order(points, initial)
+
+    assert order[0] == initial[0]
+    assert sorted(order.tolist()) == list(range(len(points)))
+    assert path_length(points, order) <= path_length(points, initial) + 1e-9
@@ -0,0 +1,151 @@
+"""path.py 不依赖bpy, 模块目录由pytest.ini加入sys.path"""
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose, assert_array_equal
+
+from path import MotionPath, arc_length_table, auto_handles, bezier_point, gauss_legendre_length
+
+
+def test_auto_handles_collinear_clamped():
+    """右侧长度为左侧的10倍, blender把右手柄限制在5倍"""
+    left, right = auto_handles(np.array([(0, 0, 0), (1, 0, 0), (11, 0, 0)], dtype=np.float64))
+    assert_allclose(left[1], (0.609589, 0, 0), atol=1e-5)
+    assert_allclose(right[1], (2.952057, 0, 0), atol=1e-5)
+
+
+def test_auto_handles_corner_clamped():
+    left, right = auto_handles(np.array([(0, 0, 0), (10, 0, 0), (10, 1, 0)], dtype=np.float64))
+    assert_allclose(left[1], (8.619687, -1.380313, 0), atol=1e-5)
+    assert_allclose(right[1], (10.276063, 0.276063, 0), atol=1e-5)
+
+
+def test_auto_handles_unclamped():
+    left, right = auto_handles(np.array([(0, 0, 0), (1, 1, 0), (3, 1, 1), (3, 4, 2)], dtype=np.float64))
+    assert_allclose(left[1:3], [(0.510629, 0.783934, -0.136652), (2.483209, 0.451861, 0.558892)], atol=1e-5)
+    assert_allclose(right[1:3], [(1.773763, 1.341631, 0.216066), (3.730852, 1.775186, 1.623821)], atol=1e-5)
+
+
+def test_auto_handles_endpoints():
+    """首尾手柄与控制点重合"""
+    points = np.array([(0, 0, 0), (1, 2, 0), (4, 0, 1)], dtype=np.float64)
+    left, right = auto_handles(points)
+    assert_allclose(left[[0, -1]], points[[0, -1]])
+    assert_allclose(right[[0, -1]], points[[0, -1]])
+
+
+def dense_reference(motion_path, count: int = 20000):
+    """密集采样的折线, 作为弧长与匀速位置的数值参考
+
+    :return: (采样点 (m, 3), 累积弧长 (m,))
+    """
+    t = np.linspace(0, 1, count)
+    points = np.concatenate([bezier_point(ctrl, t if i == 0 else t[1:])
+                             for i, ctrl in enumerate(motion_path.segments)])
+    distances = np.concatenate(((0.0,), np.cumsum(np.linalg.norm(np.diff(points, axis=0), axis=1))))
+    return points, distances
+
+
+def make_path(path_type='SMOOTH'):
+    return MotionPath([(0, 0, 0), (1, 2, 0), (4, 2, 1), (5, -1, 1), (9, 0, 0)], path_type=path_type)
+
+
+def test_arc_length_table_straight():
+    """控制点共线且手柄在1/3处时速度恒定, 弧长与参数成正比"""
+    ctrl = np.array([(0, 0, 0), (1, 1, 1), (2, 2, 2), (3, 3, 3)], dtype=np.float64)
+    t, distances = arc_length_table(ctrl)
+    assert t[0] == 0 and t[-1] == 1
+    assert_allclose(distances, t * np.sqrt(27), atol=1e-9)
+
+
+def test_arc_length_table_curve():
+    ctrl = np.array([(0, 0, 0), (0, 3, 0), (4, 3, 2), (4, 0, 0)], dtype=np.float64)
+    t, distances = arc_length_table(ctrl)
+    assert np.all(np.diff(t) > 0) and np.all(np.diff(distances) > 0)
+
+    dense_t = np.linspace(0, 1, 200001)
+    dense = np.concatenate(((0.0,), np.cumsum(np.linalg.norm(np.diff(bezier_point(ctrl, dense_t), axis=0), axis=1))))
+    assert_allclose(distances, np.interp(t, dense_t, dense), rtol=1e-6, atol=1e-6)
+
+
+def test_path_length():
+    motion_path = make_path()
+    _points, distances = dense_reference(motion_path)
+    assert_allclose(motion_path.length, distances[-1], rtol=1e-6)
+    assert_allclose(motion_path.lengths.sum(), motion_path.length)
+
+    linear = make_path('LINEAR')
+    assert_allclose(linear.length, np.linalg.norm(np.diff(linear.points, axis=0), axis=1).sum())
+
+
+def test_distance_to_param():
+    """由弧长求得的参数处, 按弧长表分段积分的弧长与输入一致"""
+    motion_path = make_path()
+    distances = np.linspace(0, motion_path.length, 1001)
+    seg, t = motion_path.distance_to_param(distances)
+    assert np.all((t >= 0) & (t <= 1))
+
+    u_col, s_col = motion_path.table.T
+    j = np.clip(np.searchsorted(u_col, seg + t, side='right') - 1, 0, len(u_col) - 2)
+    lengths = s_col[j] + gauss_legendre_length(motion_path.segments[seg], u_col[j] - seg, t)
+    assert_allclose(lengths, distances, atol=1e-6)
+
+
+def test_locate():
+    motion_path = make_path()
+    factors = motion_path.factors
+
+    # 相机处的factor位于段的起点, 最后一个相机位于最后一段的终点
+    for i, factor in enumerate(factors[:-1]):
+        assert motion_path.locate(factor) == (i, 0.0)
+    assert motion_path.locate(1.0) == (len(factors) - 2, 1.0)
+    assert motion_path.locate(-1.0) == (0, 0.0)
+
+    mid = (factors[1] + factors[2]) / 2
+    segment, fac = motion_path.locate(mid)
+    assert segment == 1
+    assert_allclose(fac, 0.5)
+
+    queries = np.linspace(-0.1, 1.1, 57)
+    segments, facs = motion_path.locate_array(queries)
+    for query, segment, fac in zip(queries, segments, facs):
+        assert (segment, fac) == pytest.approx(motion_path.locate(query))
+
+
+@pytest.mark.parametrize('path_type', ['SMOOTH', 'LINEAR'])
+def test_position_array_constant_speed(path_type):
+    """相同的factor变化量移动相同的距离, 与密集采样折线上按弧长插值的位置一致"""
+    motion_path = make_path(path_type)
+    factors = np.linspace(0, 1, 201)
+    positions = motion_path.position_array(factors)
+
+    points, distances = dense_reference(motion_path)
+    target = factors * distances[-1]
+    expected = np.stack([np.interp(target, distances, points[:, i]) for i in range(3)], axis=1)
+    assert_allclose(positions, expected, atol=1e-5)
+
+    # 控制点处的位置与相机重合
+    assert_allclose(motion_path.position_array(motion_path.factors), motion_path.points, atol=1e-7)
+    assert_allclose(motion_path.position(0.5), positions[100])
+
+
+@pytest.mark.parametrize('path_type', ['SMOOTH', 'LINEAR'])
+def test_position_array_at_cameras_random(path_type):
+    """随机路径上相机处的factor回到相机位置, 包括速度为0的首尾端点"""
+    rng = np.random.default_rng(3)
+    for _ in range(200):
+        points = rng.uniform(0, 10, size=(rng.integers(2, 8), 3))
+        motion_path = MotionPath(points, path_type=path_type)
+        assert_allclose(motion_path.position_array(motion_path.factors), points, atol=1e-9)
+        assert_allclose(motion_path.position(1.0), points[-1], atol=1e-9)
+
+
+def test_distance_to_param_ends():
+    motion_path = make_path()
+    seg, t = motion_path.distance_to_param(np.array((0.0, motion_path.length)))
+    assert_array_equal(seg, (0, len(motion_path.segments) - 1))
+    assert_array_equal(t, (0.0, 1.0))
+
+
+def test_position_array_zero_length():
+    motion_path = MotionPath([(1, 2, 3), (1, 2, 3)])
+    assert_allclose(motion_path.position_array(np.array((0, 0.5, 1))), [(1, 2, 3)] * 3)
@@ -0,0 +1,68 @@
+"""path_edit.py 不依赖bpy, 模块目录由pytest.ini加入sys.path"""
+import pytest
+
+import path_edit
+from path_edit import G_PATH_STATS, batch_path_edit, mark_path_dirty
+
+
+class StubObject:
+    def __init__(self, pointer: int):
+        self.pointer = pointer
+
+    def as_pointer(self) -> int:
+        return self.pointer
+
+
+@pytest.fixture
+def rebuilt():
+    """记录重建的物体, 并重置计数"""
+    G_PATH_STATS.update(mutations=0, rebuilds=0)
+    path_edit.G_PATH_DIRTY.clear()
+    path_edit.G_PATH_SUSPEND.clear()
+    return []
+
+
+def test_single_edit_rebuilds(rebuilt):
+    obj = StubObject(1)
+    mark_path_dirty(obj, rebuilt.append)
+    assert rebuilt == [obj]
+    assert G_PATH_STATS == {'mutations': 1, 'rebuilds': 1}
+
+
+def test_batched_edits_rebuild_once(rebuilt):
+    obj = StubObject(1)
+    with batch_path_edit(obj, rebuilt.append):
+        for _ in range(5):
+            mark_path_dirty(obj, rebuilt.append)
+        with batch_path_edit(obj, rebuilt.append):  # 嵌套的批量修改不提前重建
+            mark_path_dirty(obj, rebuilt.append)
+        assert rebuilt == []
+    assert rebuilt == [obj]
+    assert G_PATH_STATS == {'mutations': 6, 'rebuilds': 1}
+
+
+def test_batch_without_edits_does_not_rebuild(rebuilt):
+    """只切换list_index等不改变路径的修改不会重建"""
+    with batch_path_edit(StubObject(1), rebuilt.append):
+        pass
+    assert rebuilt == []
+    assert G_PATH_STATS['rebuilds'] == 0
+
+
+def test_batch_only_suspends_its_object(rebuilt):
+    obj, other = StubObject(1), StubObject(2)
+    with batch_path_edit(obj, rebuilt.append):
+        mark_path_dirty(obj, rebuilt.append)
+        mark_path_dirty(other, rebuilt.append)
+        assert rebuilt == [other]
+    assert rebuilt == [other, obj]
+
+
+def test_batch_rebuilds_after_exception(rebuilt):
+    obj = StubObject(1)
+    with pytest.raises(RuntimeError):
+        with batch_path_edit(obj, rebuilt.append):
+            mark_path_dirty(obj, rebuilt.append)
+            raise RuntimeError
+    assert rebuilt == [obj]
+    assert not path_edit.G_PATH_SUSPEND
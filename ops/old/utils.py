@@ -4,6 +4,8 @@ from pathlib import Path
 from typing import Callable, Union
 from mathutils import Vector
 
+from ...utils.depsgraph import get_depsgraph
+
 # 用于处理曲线的几何节点组 -----------------------------------------------------
 C_GET_CURVE_ATTR = 'get_curve_attr'
 C_GET_CURVE_EVAL_POS = 'get_curve_eval_pos'
@@ -46,38 +48,12 @@ def get_mesh_obj_coords(context: bpy.types.Context, obj: bpy.types.Object,
     :param obj:bpy.types.Object
     :return:list
     """
-    depsg_eval = deps if deps else context.evaluated_depsgraph_get()  # deps 由外部传入，防止冻结
+    depsg_eval = deps if deps else get_depsgraph(context)  # deps 由外部传入，防止冻结
 
     obj_eval = obj.evaluated_get(depsg_eval)
     return [v.co for v in obj_eval.data.vertices]
 
 
-def get_mesh_obj_attrs(context: bpy.types.Context, obj: bpy.types.Object,
-                       deps: Union[bpy.types.Depsgraph, None] = None) -> dict[str, list[Union[float, Vector]]]:
-    """获取mesh对象的属性值
-
-    :param obj:bpy.types.Object
-    :param attr:
-    :return:list
-    """
-    attr_dict = dict()
-
-    depsg_eval = deps if deps else context.evaluated_depsgraph_get()  # deps 由外部传入，防止冻结
-    depsg_eval.update()
-    obj_eval = obj.evaluated_get(depsg_eval)
-
-    for name, attr in obj_eval.data.attributes.items():
-        attr_data = attr.data
-        try:
-            attr_dict[name] = [v.value for v in attr_data.values()]
-        except:
-            attr_dict[name] = [v.vector for v in attr_data.values()]
-
-    # print(attr_dict)
-
-    return attr_dict
-
-
 def view3d_find() -> Union[tuple[bpy.types.Region, bpy.types.RegionView3D], tuple[None, None]]:
     # returns first 3d view, normally we get from context
     for area in bpy.context.window.screen.areas:
@@ -124,6 +100,71 @@ def create_tool_collection(name: str = 'CameraHelper') -> bpy.types.Collection:
     return coll
 
 
+def set_spline_point(spline: bpy.types.Spline, index: int, coord: Vector, type: str = 'SMOOTH'):
+    """设置样条上的单个点, 平滑曲线使用自动手柄"""
+    x, y, z = coord
+    if type == 'SMOOTH':
+        pt = spline.bezier_points[index]
+        pt.handle_right_type = 'AUTO'
+        pt.handle_left_type = 'AUTO'
+        pt.co = (x, y, z)
+        pt.handle_left = (x, y, z)
+        pt.handle_right = (x, y, z)
+    else:
+        spline.points[index].co = (x, y, z, 1)
+
+
+def map_end_handles(spline: bpy.types.Spline):
+    """取消端点影响"""
+
+    def map_handle_to_co(pt):
+        pt.handle_right_type = 'FREE'
+        pt.handle_left_type = 'FREE'
+        pt.handle_left = pt.co
+        pt.handle_right = pt.co
+
+    map_handle_to_co(spline.bezier_points[0])
+    map_handle_to_co(spline.bezier_points[-1])
+
+
+def fill_curve_data(curve_data: bpy.types.Curve, coords: list[Vector], close_spline: bool = False,
+                    type: str = 'SMOOTH'):
+    """清空曲线数据并根据点集重新生成样条"""
+    curve_data.splines.clear()
+    # 创建样条
+    # 创建点
+    if type == 'SMOOTH':
+        spline = curve_data.splines.new('BEZIER')
+        spline.bezier_points.add(len(coords) - 1)
+    else:
+        spline = curve_data.splines.new('POLY')
+        spline.points.add(len(coords) - 1)
+    # 设置点
+    for i, coord in enumerate(coords):
+        set_spline_point(spline, i, coord, type)
+
+    # 闭合，或为可选项
+    spline.use_cyclic_u = close_spline
+
+    if type == 'SMOOTH':
+        map_end_handles(spline)
+
+
+def update_curve_points(curve_obj: bpy.types.Object, coords: list[Vector], indices: list[int],
+                        type: str = 'SMOOTH'):
+    """只更新曲线中发生变化的点
+
+    :param coords: 所有点的位置
+    :param indices: 需要更新的点
+    """
+    spline = curve_obj.data.splines[0]
+    for i in indices:
+        set_spline_point(spline, i, coords[i], type)
+
+    if type == 'SMOOTH' and indices:
+        map_end_handles(spline)
+
+
 def gen_bezier_curve_from_points(coords: list[Vector], curve_name: str, resolution_u: int = 12,
                                  close_spline: bool = False, type: str = 'SMOOTH') -> bpy.types.Object:
     """根据点集生成贝塞尔曲线
@@ -145,39 +186,7 @@ def gen_bezier_curve_from_points(coords: list[Vector], curve_name: str, resoluti
     curve_data = bpy.data.curves.new(curve_name, type='CURVE')
     curve_data.dimensions = '3D'
     curve_data.resolution_u = resolution_u
-    # 创建样条
-    # 创建点
-    if type == 'SMOOTH':
-        spline = curve_data.splines.new('BEZIER')
-        spline.bezier_points.add(len(coords) - 1)
-    else:
-        spline = curve_data.splines.new('POLY')
-        spline.points.add(len(coords) - 1)
-    # 设置点
-    for i, coord in enumerate(coords):
-        x, y, z = coord
-        if type == 'SMOOTH':
-            spline.bezier_points[i].handle_right_type = 'AUTO'
-            spline.bezier_points[i].handle_left_type = 'AUTO'
-            spline.bezier_points[i].co = (x, y, z)
-            spline.bezier_points[i].handle_left = (x, y, z)
-            spline.bezier_points[i].handle_right = (x, y, z)
-        else:
-            spline.points[i].co = (x, y, z, 1)
-
-    # 闭合，或为可选项
-    spline.use_cyclic_u = close_spline
-
-    if type == 'SMOOTH':
-        # 取消端点影响a
-        def map_handle_to_co(pt):
-            pt.handle_right_type = 'FREE'
-            pt.handle_left_type = 'FREE'
-            pt.handle_left = pt.co
-            pt.handle_right = pt.co
-
-        map_handle_to_co(spline.bezier_points[0])
-        map_handle_to_co(spline.bezier_points[-1])
+    fill_curve_data(curve_data, coords, close_spline, type)
 
     # 创建物体
     curve_obj = bpy.data.objects.new(curve_name, curve_data)
@@ -249,4 +258,17 @@ def gen_sample_attr_obj(curve_obj):
 def gen_sample_mesh_obj(curve_obj):
     return gen_curve_sample_obj(curve_obj, postfix='_mesh', node_group=C_GET_CURVE_EVAL_POS)
 
+
+def remove_sample_obj(sample_obj):
+    """删除采样物体及其网格数据
+
+    :param sample_obj: gen_sample_attr_obj/gen_sample_mesh_obj 生成的物体
+    """
+    if sample_obj is None:
+        return
+    mesh = sample_obj.data
+    bpy.data.objects.remove(sample_obj)
+    if mesh is not None and mesh.users == 0:
+        bpy.data.meshes.remove(mesh)
+
 # --------------------------------------------------------------------------------------------------------------------
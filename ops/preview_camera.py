@@ -5,7 +5,7 @@ from ..utils import get_operator_bl_idname, get_camera
 
 
 class PreviewCamera(bpy.types.Operator):
-    """Camera Thumbnails\nLeft Click: Enable\nCtrl: Pin Selected Camera\nCtrl Shift Click: Send to Viewer"""
+    """Camera Thumbnails\nLeft Click: Enable\nCtrl: Pin Selected Camera\nAlt: Contact Sheet\nCtrl Shift Click: Send to Viewer"""
     bl_idname = get_operator_bl_idname("preview_camera")
     bl_label = "Preview Camera"
 
@@ -18,6 +18,10 @@ class PreviewCamera(bpy.types.Operator):
 
     def invoke(self, context, event):
         camera = get_camera(context)
+        if event.alt:
+            CameraThumbnails.switch_contact_sheet(context)
+            context.area.tag_redraw()
+            return {"FINISHED"}
         if camera is None and not CameraThumbnails.check_is_draw(context):
             self.report({'ERROR'}, "Please select a camera")
             return {'CANCELLED'}
@@ -31,6 +31,26 @@ class DrawMotionCurve(bpy.types.PropertyGroup):
 class CameraThumb(bpy.types.PropertyGroup):
     max_width: IntProperty(name='Max Width', default=400, min=50, soft_max=800)
     max_height: IntProperty(name='Max Height', default=300, min=50, soft_max=600)
+    refresh_rate: FloatProperty(name='Refresh Rate', default=10, min=1, soft_max=60,
+                                description='Maximum thumbnail refreshes per second while the scene is being edited')
+    use_progressive: BoolProperty(name='Progressive', default=True,
+                                  description='Render thumbnails at quarter resolution while the scene is being edited '
+                                              'and refine to full resolution when editing stops')
+
+    # 拼图
+    contact_sheet_filter: EnumProperty(name='Cameras', items=[
+        ('ALL', 'All', 'All cameras in the scene'),
+        ('SELECTED', 'Selected', 'Selected cameras'),
+        ('VISIBLE', 'Visible', 'Cameras visible in the viewport'),
+        ('NAME', 'Name', 'Cameras whose name matches the pattern'),
+    ], default='ALL')
+    contact_sheet_pattern: StringProperty(name='Pattern', default='*',
+                                          description='Camera name pattern, wildcards * and ? are supported')
+    contact_sheet_columns: IntProperty(name='Columns', default=0, min=0, soft_max=16,
+                                       description='Number of columns, 0 for automatic')
+    contact_sheet_tile_width: IntProperty(name='Tile Width', default=160, min=32, soft_max=480)
+    contact_sheet_budget: FloatProperty(name='Time Budget', default=8, min=1, soft_max=50,
+                                        description='Milliseconds spent rendering contact sheet tiles per frame')
 
     position: EnumProperty(name='Position', items=[
         ('TOP_LEFT', 'Top Left', ''),
@@ -83,6 +103,19 @@ class CAMHP_Preference(bpy.types.AddonPreferences):
         box.prop(self.camera_thumb, 'max_height', slider=True)
         row = box.row(align=True)
         row.prop(self.camera_thumb, 'position', expand=True)
+        box.prop(self.camera_thumb, 'refresh_rate')
+        box.prop(self.camera_thumb, 'use_progressive')
+        from ..camera_thumbnails import CameraThumbnails
+        box.label(text=CameraThumbnails.get_refresh_report())
+
+        box = col.box().column(align=True)
+        box.label(text='Contact Sheet', icon='IMGDISPLAY')
+        box.prop(self.camera_thumb, 'contact_sheet_filter')
+        if self.camera_thumb.contact_sheet_filter == 'NAME':
+            box.prop(self.camera_thumb, 'contact_sheet_pattern')
+        box.prop(self.camera_thumb, 'contact_sheet_columns')
+        box.prop(self.camera_thumb, 'contact_sheet_tile_width')
+        box.prop(self.camera_thumb, 'contact_sheet_budget')
 
 
 def register():
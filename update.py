@@ -1,16 +1,45 @@
 import bpy
 from bpy.app.handlers import persistent
 
+from .debug import DEBUG_DEPSGRAPH
+from .utils.depsgraph import invalidate_depsgraph, next_frame_stats, G_DEPSGRAPH_LAST_FRAME_STATS
+
 
 @persistent
 def depsgraph_update_post(scene, depsgraph):
     from .ops.preview_camera import CameraThumbnails
-    CameraThumbnails.update()
+    invalidate_depsgraph()
+    CameraThumbnails.request_update(depsgraph)
+
+
+@persistent
+def frame_change_post(scene, depsgraph):
+    next_frame_stats()
+    invalidate_depsgraph()
+    if DEBUG_DEPSGRAPH:
+        print(f"depsgraph frame {scene.frame_current}\t", G_DEPSGRAPH_LAST_FRAME_STATS)
+
+
+@persistent
+def load_post(*args):
+    from .camera_thumbnails import CameraThumbnails
+    invalidate_depsgraph()
+    CameraThumbnails.reset_scheduler()
+    CameraThumbnails.free()
 
 
 def register():
     bpy.app.handlers.depsgraph_update_post.append(depsgraph_update_post)
+    bpy.app.handlers.frame_change_post.append(frame_change_post)
+    bpy.app.handlers.load_post.append(load_post)
 
 
 def unregister():
     bpy.app.handlers.depsgraph_update_post.remove(depsgraph_update_post)
+    bpy.app.handlers.frame_change_post.remove(frame_change_post)
+    bpy.app.handlers.load_post.remove(load_post)
+    invalidate_depsgraph()
+
+    from .camera_thumbnails import CameraThumbnails
+    CameraThumbnails.reset_scheduler()
+    CameraThumbnails.free()
@@ -0,0 +1,57 @@
+"""共享的depsgraph句柄
+
+每个tick(handler调用或一次重绘)只调用一次 evaluated_depsgraph_get, CameraHelper 内所有求值复用同一个句柄.
+handler 触发时使句柄失效, 计数器用于统计每次帧切换插件触发的depsgraph获取/复用次数.
+"""
+import bpy
+
+G_DEPSGRAPH = {
+    'depsgraph': None,  # bpy.types.Depsgraph, 只保存 evaluated_depsgraph_get 的结果
+    'view_layer': 0,  # 句柄所属视图层的指针, 切换场景/视图层时重新获取
+}
+# 全部计数
+G_DEPSGRAPH_STATS = {'ticks': 0, 'fetches': 0, 'reuses': 0}
+# 当前帧与上一帧的计数, 帧切换时交换
+G_DEPSGRAPH_FRAME_STATS = {'fetches': 0, 'reuses': 0}
+G_DEPSGRAPH_LAST_FRAME_STATS = {}
+
+
+def _count(key: str):
+    G_DEPSGRAPH_STATS[key] += 1
+    G_DEPSGRAPH_FRAME_STATS[key] += 1
+
+
+def get_depsgraph(context: "bpy.types.Context | None" = None) -> bpy.types.Depsgraph:
+    """获取本tick的depsgraph, 同一tick内只调用一次 evaluated_depsgraph_get
+
+    :param context: 默认为bpy.context
+    :return: bpy.types.Depsgraph
+    """
+    if context is None:
+        context = bpy.context
+    view_layer = context.view_layer.as_pointer()
+
+    if G_DEPSGRAPH['depsgraph'] is not None and G_DEPSGRAPH['view_layer'] == view_layer:
+        _count('reuses')
+        return G_DEPSGRAPH['depsgraph']
+
+    G_DEPSGRAPH['depsgraph'] = context.evaluated_depsgraph_get()
+    G_DEPSGRAPH['view_layer'] = view_layer
+    _count('fetches')
+    return G_DEPSGRAPH['depsgraph']
+
+
+def invalidate_depsgraph():
+    """开始新的tick, 丢弃旧句柄
+    handler传入的depsgraph不保存(渲染时在handler结束后会被释放), 之后的调用重新获取
+    """
+    G_DEPSGRAPH_STATS['ticks'] += 1
+    G_DEPSGRAPH['depsgraph'] = None
+
+
+def next_frame_stats():
+    """帧切换时调用, 保存上一帧的计数并清零"""
+    G_DEPSGRAPH_LAST_FRAME_STATS.clear()
+    G_DEPSGRAPH_LAST_FRAME_STATS.update(G_DEPSGRAPH_FRAME_STATS)
+    for key in G_DEPSGRAPH_FRAME_STATS:
+        G_DEPSGRAPH_FRAME_STATS[key] = 0